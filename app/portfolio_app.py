@@ -1,17 +1,19 @@
 import streamlit as st
+import json
 import os
 import sys
 from PIL import Image
-import numpy as np
-import plotly.express as px
-import cv2
-
-# Startup message for debugging
-st.write("🚀 App loading... Please wait for model initialization.")
 
 # ✅ Add parent directory to Python path BEFORE importing from src
+# Heavy modules (plotly, ultralytics, the webcam stack) are imported lazily by
+# the page or background thread that needs them
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src.inference import load_model, predict_image, predict_webcam, get_detection_summary
+from src.client import InferenceClient
+from src.inference import BACKENDS, ModelLoader, ResultCache, detect_image, predict_batch, get_detection_summary
+from src.metrics import METRICS, serve_metrics
+from src.registry import DEFAULT_REGISTRY, ModelRegistry, RegistryWatcher
+from src.scheduler import InferenceScheduler
+from src.zones import DEFAULT_ZONES_PATH, load_zones
 
 # 🎨 Premium Page Configuration
 st.set_page_config(
@@ -156,29 +158,128 @@ body, .main, .stApp {
 
 
 # 📊 Model Status with Animation
+MODEL_PATH = "app/models/best.pt"
+
+@st.cache_resource
+def start_model_loader(backend="pytorch"):
+    # One loader per backend for the whole server: the model is built and
+    # warmed up in the background while the first page renders. With a model
+    # registry the watcher also hot-swaps whenever the active version changes.
+    registry = ModelRegistry(os.environ.get("CCTV_REGISTRY", DEFAULT_REGISTRY))
+    if registry.active() is not None:
+        loader = RegistryWatcher(registry, backend=backend)
+    elif os.path.exists(MODEL_PATH):
+        loader = ModelLoader(MODEL_PATH, backend=backend)
+    else:
+        return None
+    loader.start()
+    return loader
+
 @st.cache_resource
-def load_cached_model():
-    model_path = "app/models/best.pt"
-    if not os.path.exists(model_path):
-        st.error("Model file not found! Please upload app/models/best.pt. If your model is too large for GitHub, see the deployment guide for instructions to download it at runtime.")
+def start_scheduler(backend="pytorch"):
+    # All sessions and webcam streams share the model through one queue that
+    # micro-batches their requests, instead of racing inside ultralytics
+    loader = start_model_loader(backend)
+    if loader is None:
         return None
+    return InferenceScheduler(model_source=lambda: loader.model,
+                              max_batch=int(os.environ.get("CCTV_MAX_BATCH", 8)),
+                              max_wait_ms=float(os.environ.get("CCTV_BATCH_WAIT_MS", 8)))
+
+def scheduled_model():
+    """The scheduler standing in for the model, or None while no model is loaded."""
+    return scheduler if model_loader is not None and model_loader.model is not None else None
+
+def wait_for_model():
+    """Block the current page until the model is ready; returns None if it failed."""
+    if model_loader is None:
+        return None
+    if not model_loader.ready:
+        with st.spinner("⏳ Warming up the model..."):
+            model_loader.wait()
+    return scheduled_model()
+
+def run_detect_image(model, image):
+    """detect_image on the local model, or the same request sent to the inference server."""
+    if isinstance(model, InferenceClient):
+        return model.detect(image, zone_filter=zone_filter)
+    return detect_image(model, image, zone_filter=zone_filter, cache=result_cache)
+
+def run_predict_batch(model, images, batch_size):
+    """predict_batch on the local model, or the same batches sent to the inference server."""
+    if isinstance(model, InferenceClient):
+        return model.detect_batch(images, batch_size=batch_size)
+    return predict_batch(model, images, batch_size=batch_size, cache=result_cache)
+
+backend = st.sidebar.selectbox("⚙️ Inference backend", list(BACKENDS),
+                               index=list(BACKENDS).index(os.environ.get("CCTV_BACKEND", "pytorch")),
+                               help="ONNX and OpenVINO models are exported from best.pt on first use and cached next to it")
+# With CCTV_INFERENCE_URL set, images and batches go to a separate inference
+# server (src/server.py); a local model is only loaded for the webcam page
+inference_url = os.environ.get("CCTV_INFERENCE_URL")
+inference_client = InferenceClient(inference_url) if inference_url else None
+model_loader = start_model_loader(backend) if inference_client is None else None
+scheduler = start_scheduler(backend) if inference_client is None else None
+
+@st.cache_resource
+def get_result_cache():
+    # Reruns re-submit the same uploads; set CCTV_RESULT_CACHE to a directory
+    # to also keep results across restarts, capped at CCTV_RESULT_CACHE_DISK_ITEMS files
+    return ResultCache(max_items=int(os.environ.get("CCTV_RESULT_CACHE_ITEMS", 256)),
+                       disk_dir=os.environ.get("CCTV_RESULT_CACHE"),
+                       max_disk_items=int(os.environ.get("CCTV_RESULT_CACHE_DISK_ITEMS", 10000)))
+
+result_cache = get_result_cache()
+
+@st.cache_resource
+def start_metrics_server(port):
+    # Prometheus scrape endpoint on localhost, one per server process
     try:
-        model = load_model(model_path)
-        if model is not None:
-            st.success("✅ Model loaded successfully!")
-        return model
-    except Exception as e:
-        st.error(f"Error loading model: {e}")
+        return serve_metrics(port)
+    except OSError as e:
+        print(f"[ERROR] Metrics endpoint on port {port} unavailable: {e}")
         return None
 
-model = load_cached_model()
+metrics_port = int(os.environ.get("CCTV_METRICS_PORT", 9464))
+metrics_server = start_metrics_server(metrics_port) if metrics_port else None
+
+@st.cache_resource
+def load_cached_zones(path, mtime):
+    return load_zones(path)
+
+# 📐 Zones of interest (config/zones.json, see config/zones.example.json)
+zone_filter = None
+zones_path = os.environ.get("CCTV_ZONES", DEFAULT_ZONES_PATH)
+if os.path.exists(zones_path):
+    camera_zones = load_cached_zones(zones_path, os.path.getmtime(zones_path))
+    zone_camera = st.sidebar.selectbox("📐 Zones of interest", ["Whole frame"] + list(camera_zones),
+                                       help="Only analyse the configured zones of this camera")
+    zone_filter = camera_zones.get(zone_camera)
 
 # Show model status in sidebar
-if model is not None:
-    st.sidebar.success("✅ Model Ready")
-else:
+if inference_client is not None:
+    server_health = inference_client.health()
+    if server_health["status"] in ('ready', 'swapping'):
+        st.sidebar.success(f"✅ Inference server ready (model {server_health['model_version']})")
+    elif server_health["status"] in ('unreachable', 'failed'):
+        st.sidebar.error(f"❌ Inference server {inference_url} {server_health['status']}: {server_health['error']}")
+    else:
+        st.sidebar.info(f"⏳ Inference server {server_health['status']}...")
+elif model_loader is None:
     st.sidebar.error("❌ Model Not Available")
-    st.sidebar.info("💡 Upload your model file to app/models/best.pt")
+    st.sidebar.info("💡 Upload your model file to app/models/best.pt or register it with src/registry.py. "
+                    "If your model is too large for GitHub, see the deployment guide for instructions "
+                    "to download it at runtime.")
+elif model_loader.state in ('ready', 'swapping'):
+    version = f" {model_loader.version}" if getattr(model_loader, 'version', None) else ""
+    st.sidebar.success(f"✅ Model{version} Ready (loaded in {model_loader.timings['load']:.1f}s, "
+                       f"warmed up in {model_loader.timings['warmup']:.1f}s)")
+    if model_loader.state == 'swapping':
+        st.sidebar.info("🔄 Warming up a new model version, it will be swapped in when ready")
+elif model_loader.state == 'failed':
+    st.sidebar.error(f"❌ Error loading model: {model_loader.error}")
+else:
+    st.sidebar.info("⏳ Loading model..." if model_loader.state == 'loading' else "🔥 Warming up model...")
 
 # 🎛️ Enhanced Sidebar with Premium Design
 with st.sidebar:
@@ -208,6 +309,9 @@ with st.sidebar:
     with col2:
         st.metric("Detection Rate", "94.2%", "+2.1%")
     
+    # Filled in after the page has run so it includes this rerun's lookups
+    cache_panel = st.empty()
+    
     # 🔍 Detection Classes Info (No wrap, no overflow)
     detection_classes_html = """
     <div style="background: rgba(255,255,255,0.08); padding: 1.1rem 1.2rem; border-radius: 12px; margin-top: 1.5rem; border: 1px solid rgba(255,255,255,0.13);">
@@ -270,6 +374,18 @@ with st.sidebar:
     """
     st.markdown(detection_classes_html, unsafe_allow_html=True)
 
+def measured_fps(path="benchmarks/results.json"):
+    """Webcam FPS from the latest src/benchmark.py run, if there is one."""
+    try:
+        with open(path, "r") as f:
+            results = json.load(f)["results"]
+    except (OSError, ValueError, KeyError):
+        return None
+    for name in ("recv/720p", "recv/480p", "recv/1080p"):
+        if name in results:
+            return results[name]["throughput_per_s"], name.split("/")[1]
+    return None
+
 # 📊 Dashboard View
 if option == "📊 Dashboard":
     st.markdown("""
@@ -281,7 +397,9 @@ if option == "📊 Dashboard":
         </p>
     </div>
     """, unsafe_allow_html=True)
-    st.markdown("""
+    fps = measured_fps()
+    speed_value, speed_label = (f"{fps[0]:.0f} FPS", f"Webcam Speed ({fps[1]}, measured)") if fps else ("—", "Run src/benchmark.py")
+    st.markdown(f"""
     <div class="stats-grid">
         <div class="stat-card">
             <div class="stat-icon">🖼️</div>
@@ -300,8 +418,8 @@ if option == "📊 Dashboard":
         </div>
         <div class="stat-card">
             <div class="stat-icon">🚀</div>
-            <div class="stat-value">60 FPS</div>
-            <div class="stat-label">Processing Speed</div>
+            <div class="stat-value">{speed_value}</div>
+            <div class="stat-label">{speed_label}</div>
         </div>
     </div>
     """, unsafe_allow_html=True)
@@ -310,6 +428,7 @@ if option == "📊 Dashboard":
         'Accuracy': [96.5, 94.2, 92.8, 89.5, 87.3],
         'Speed': [45, 52, 38, 61, 42]
     }
+    import plotly.express as px
     colors = ['#667eea', '#764ba2', '#4facfe', '#19d219', '#e53935']  # Custom palette
     fig = px.bar(
         performance_data, x='Class', y='Accuracy',
@@ -364,6 +483,7 @@ elif option == "📷 Single Image":
                                  help="Upload a single image to detect PPE and safety violations")
     
     if image_file:
+        model = inference_client or wait_for_model()
         col1, col2 = st.columns(2)
         image = Image.open(image_file)
         with col1:
@@ -375,13 +495,11 @@ elif option == "📷 Single Image":
             else:
                 try:
                     with st.spinner("🔍 Processing image..."):
-                        result_img = predict_image(model, image)
-                        st.image(result_img, caption="Detected Objects", use_container_width=True)
+                        result = run_detect_image(model, image)
+                        st.image(result.image, caption="Detected Objects", use_container_width=True)
                         
                         # Show detection summary
-                        img_array = np.array(image.convert("RGB"))
-                        results = model(img_array)
-                        summary = get_detection_summary(results)
+                        summary = get_detection_summary(result)
                         st.info(f"📊 Detection Summary: {summary}")
                 except Exception as e:
                     st.error(f"Detection failed: {e}")
@@ -400,6 +518,19 @@ elif option == "📁 Batch Processing":
                                   accept_multiple_files=True,
                                   help="Upload multiple images to batch process")
     
+    # The shared scheduler (or the inference server) never runs more than
+    # its max_batch images in one forward pass
+    if inference_client is not None:
+        max_batch = (server_health.get("scheduler") or {}).get("max_batch", 8)
+    else:
+        max_batch = scheduler.max_batch if scheduler is not None else 8
+    batch_size = 1
+    if max_batch > 1:
+        batch_size = st.slider("Images per forward pass", min_value=1, max_value=max_batch, value=min(8, max_batch),
+                               help=f"Images run through the model together, up to the scheduler's limit of "
+                                    f"{max_batch} (CCTV_MAX_BATCH, or --max-batch on the inference server); "
+                                    f"frames from other sessions may share the pass")
+    
     if image_files:
         st.info(f"📁 Processing {len(image_files)} images...")
         
@@ -407,7 +538,11 @@ elif option == "📁 Batch Processing":
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        for i, image_file in enumerate(image_files):
+        images = [Image.open(image_file) for image_file in image_files]
+        model = inference_client or wait_for_model()
+        batch_results = run_predict_batch(model, images, batch_size) if model is not None else None
+        
+        for i, (image_file, image) in enumerate(zip(image_files, images)):
             status_text.text(f"Processing {image_file.name}... ({i+1}/{len(image_files)})")
             progress_bar.progress((i + 1) / len(image_files))
             
@@ -416,7 +551,6 @@ elif option == "📁 Batch Processing":
             col1, col2 = st.columns(2)
             
             with col1:
-                image = Image.open(image_file)
                 st.image(image, caption=f"Original - {image_file.name}", use_container_width=True)
             
             with col2:
@@ -426,17 +560,17 @@ elif option == "📁 Batch Processing":
                 else:
                     try:
                         with st.spinner(f"🔍 Processing {image_file.name}..."):
-                            result_img = predict_image(model, image)
+                            result = next(batch_results)
                             
                             # Get detection summary
-                            img_array = np.array(image.convert("RGB"))
-                            results = model(img_array)
-                            summary = get_detection_summary(results)
+                            summary = get_detection_summary(result)
                             
-                            st.image(result_img, caption=f"Detected - {image_file.name}", use_container_width=True)
+                            st.image(result.image, caption=f"Detected - {image_file.name}", use_container_width=True)
                             st.markdown(f"**📊 Summary:** {summary}")
                     except Exception as e:
                         st.error(f"Failed to process {image_file.name}: {e}")
+                        # A failed batch ends the generator; resume with the images after this one
+                        batch_results = run_predict_batch(model, images[i + 1:], batch_size)
                         st.image(image, caption=f"Original - {image_file.name} (Processing Failed)", use_container_width=True)
             
             st.markdown("---")
@@ -453,6 +587,29 @@ elif option == "📹 Real-time Webcam":
     """, unsafe_allow_html=True)
 
     st.info("🎥 Click 'Start Webcam Detection' to begin. Click 'Stop' to end.")
+    webcam_mode = st.selectbox("Processing mode",
+                               ["⚡ Async (latest frame)", "🎯 Tracking (detect every N frames)", "🐢 Every frame"],
+                               index=0)
+    detect_every = 1
+    if webcam_mode.startswith("🎯"):
+        detect_every = st.slider("Run detector every N frames", min_value=2, max_value=10, value=4)
+    motion_threshold = None
+    if st.checkbox("Skip static scenes (motion gate)", value=True):
+        motion_threshold = st.slider("Changed-pixel fraction that counts as motion", min_value=0.001,
+                                     max_value=0.1, value=0.01, step=0.001, format="%.3f")
+    latency_budget_ms = None
+    if st.checkbox("Adaptive resolution (latency budget)", value=False,
+                   help="Drop to a smaller input size under load instead of dropping frames"):
+        latency_budget_ms = st.slider("Inference budget per frame (ms)", min_value=20, max_value=500, value=100, step=10)
+    tile_size, tile_overlap, tile_focus = None, 0.2, None
+    if st.checkbox("Tiled inference (high-resolution cameras)", value=False,
+                   help="Run native-resolution tiles so small, distant workers keep their pixels"):
+        tile_size = st.select_slider("Tile size (px)", options=[320, 480, 640, 800, 960, 1280], value=640)
+        tile_overlap = st.slider("Tile overlap", min_value=0.0, max_value=0.5, value=0.2, step=0.05)
+        focus_options = {"Whole frame": None, "Where persons were seen": "persons"}
+        if motion_threshold is not None:
+            focus_options["Where motion was seen"] = "motion"
+        tile_focus = focus_options[st.selectbox("Tiles to run", list(focus_options), index=0)]
     # Remove columns for webcam, display in main area for max width
     if "webcam_active" not in st.session_state:
         st.session_state["webcam_active"] = False
@@ -462,13 +619,32 @@ elif option == "📹 Real-time Webcam":
             st.session_state["webcam_active"] = True
 
     if st.session_state["webcam_active"]:
+        if inference_client is not None and model_loader is None:
+            # Streams run frame by frame on a local model, loaded when first needed
+            model_loader = start_model_loader(backend)
+            scheduler = start_scheduler(backend)
+        model = wait_for_model()
         if model is None:
             st.error("Model not loaded. Please ensure app/models/best.pt exists and is valid.")
             st.session_state["webcam_active"] = False
         else:
             try:
-                from src.inference import predict_webcam
-                predict_webcam(model)
+                from src.webcam import predict_webcam
+                predict_webcam(model, async_mode=webcam_mode.startswith("⚡"), detect_every=detect_every,
+                               motion_threshold=motion_threshold, zone_filter=zone_filter,
+                               latency_budget_ms=latency_budget_ms,
+                               model_source=scheduled_model, tile_size=tile_size,
+                               tile_overlap=tile_overlap, tile_focus=tile_focus)
+                
+                transformer = st.session_state.get("yolo_transformer")
+                if transformer is not None and transformer.motion_gate is not None:
+                    gate_stats = transformer.motion_gate.stats()
+                    st.caption(f"🎞️ Motion gate: {gate_stats['inferred']} inferred, {gate_stats['gated']} skipped "
+                               f"({gate_stats['saved']:.0%} of inferences saved)")
+                if transformer is not None and transformer.resolution is not None:
+                    res_stats = transformer.resolution.stats()
+                    st.caption(f"📐 Input size {res_stats['imgsz']} px, {res_stats['ema_ms']:.0f} ms per frame "
+                               f"(budget {res_stats['budget_ms']:.0f} ms)")
                 
                 if st.button("🛑 Stop Webcam Detection", key="stop_webcam_portfolio"):
                     st.session_state["webcam_active"] = False
@@ -479,6 +655,32 @@ elif option == "📹 Real-time Webcam":
                 st.info("💡 If webcam doesn't work, try refreshing the page or check browser permissions.")
                 st.session_state["webcam_active"] = False
 
+# 🗃️ Result cache hit/miss counts
+cache_stats = result_cache.stats()
+with cache_panel.container():
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Cache Hits", f"{cache_stats['hits']:,}", help=f"{cache_stats['disk_hits']:,} served from disk")
+    with col2:
+        st.metric("Cache Misses", f"{cache_stats['misses']:,}")
+    st.caption(f"🗃️ {cache_stats['hit_rate']:.0%} of inferences skipped, {cache_stats['items']} results in memory")
+
+    # ⏱️ Per-stage latency from the shared histograms
+    latency_rows = METRICS.summary()
+    with st.expander("⏱️ Stage latency", expanded=False):
+        if latency_rows:
+            st.dataframe([{"Path": row["path"], "Stage": row["stage"], "Count": row["count"],
+                           "p50 ms": round(row["p50_ms"], 1), "p95 ms": round(row["p95_ms"], 1)}
+                          for row in latency_rows], hide_index=True)
+        else:
+            st.caption("No inferences yet")
+        if scheduler is not None and scheduler.batches:
+            scheduler_stats = scheduler.stats()
+            st.caption(f"🧺 {scheduler_stats['requests']} frames in {scheduler_stats['batches']} batches "
+                       f"(mean batch {scheduler_stats['mean_batch']:.1f})")
+        if metrics_server is not None:
+            st.caption(f"📈 Prometheus metrics at http://127.0.0.1:{metrics_server.server_address[1]}/metrics")
+
 # 📊 Footer with Portfolio Information
 st.markdown("---")
 st.markdown("""
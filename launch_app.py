@@ -9,41 +9,37 @@ import sys
 import subprocess
 import time
 
+from src.registry import ModelRegistry, file_sha256
+
 def check_training_status():
     """Check if training has completed"""
     model_path = "runs/detect/train25/weights/best.pt"
     return os.path.exists(model_path)
 
 def check_webapp_model():
-    """Check if the web app has the latest model"""
-    webapp_model = "app/models/best.pt"
+    """Check if the model registry already serves the latest trained model"""
     training_model = "runs/detect/train25/weights/best.pt"
-    
-    if not os.path.exists(webapp_model):
-        return False
+    registry = ModelRegistry()
     
     if not os.path.exists(training_model):
         return True  # Use existing model
     
-    # Compare file modification times
-    webapp_time = os.path.getmtime(webapp_model)
-    training_time = os.path.getmtime(training_model)
-    
-    return training_time <= webapp_time
+    # Compare checksums with the active version
+    active = registry.active()
+    return active is not None and registry.manifest(active)["sha256"] == file_sha256(training_model)
 
-def copy_latest_model():
-    """Copy the latest trained model to the web app"""
+def register_latest_model():
+    """Register the latest trained model and make it the active version"""
     source = "runs/detect/train25/weights/best.pt"
-    destination = "app/models/best.pt"
     
     if os.path.exists(source):
         try:
-            import shutil
-            shutil.copy2(source, destination)
-            print(f"✅ Updated web app with latest model")
+            # A running app picks up the new active version without a restart
+            version = ModelRegistry().register(source, note="runs/detect/train25")
+            print(f"✅ Web app now serves model version {version}")
             return True
         except Exception as e:
-            print(f"❌ Error copying model: {e}")
+            print(f"❌ Error registering model: {e}")
             return False
     return False
 
@@ -82,7 +78,7 @@ def main():
     # Check if web app needs model update
     if not check_webapp_model():
         print("🔄 Updating web app with latest model...")
-        if not copy_latest_model():
+        if not register_latest_model():
             print("⚠️ Could not update model, using existing one")
     
     # Launch the web app
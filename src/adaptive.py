@@ -0,0 +1,76 @@
+class AdaptiveResolution:
+    """
+    Pick the model input size for one stream so inference stays within a
+    latency budget.
+
+    Per-frame inference time is smoothed with an EMA. The controller steps
+    down to the next smaller size once the smoothed latency has been over
+    budget for `patience` frames, and only steps back up when the cost
+    predicted for the larger size (latency scales with pixel count) would sit
+    below `headroom` x budget for `patience` frames. After a switch no other
+    switch happens for `cooldown` frames, so the EMA settles at the new size
+    first. The gap between the two thresholds plus the cooldown keeps it from
+    oscillating.
+    """
+    def __init__(self, sizes=(320, 480, 640), budget_ms=100.0, smoothing=0.2, headroom=0.8, patience=10,
+                 cooldown=30):
+        self.sizes = sorted(sizes)
+        self.budget_ms = budget_ms
+        self.smoothing = smoothing
+        self.headroom = headroom
+        self.patience = patience
+        self.cooldown = cooldown
+        self.index = len(self.sizes) - 1
+        self.ema_ms = None
+        self._over = 0
+        self._under = 0
+        self._cooling = 0
+        self.switches = 0
+
+    @property
+    def imgsz(self):
+        return self.sizes[self.index]
+
+    def record(self, latency_ms):
+        """
+        Feed the measured inference time of the last frame (at the current
+        size). Returns the size to use for the next frame.
+        """
+        if self.ema_ms is None:
+            self.ema_ms = latency_ms
+        else:
+            self.ema_ms += self.smoothing * (latency_ms - self.ema_ms)
+
+        if self._cooling > 0:
+            self._cooling -= 1
+            return self.imgsz
+        if self.ema_ms > self.budget_ms:
+            self._over += 1
+            self._under = 0
+        elif self.index < len(self.sizes) - 1 and self._predicted(self.index + 1) < self.headroom * self.budget_ms:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+
+        if self._over >= self.patience and self.index > 0:
+            self._switch(self.index - 1)
+        elif self._under >= self.patience:
+            self._switch(self.index + 1)
+        return self.imgsz
+
+    def _predicted(self, index):
+        return self.ema_ms * (self.sizes[index] / self.imgsz) ** 2
+
+    def _switch(self, index):
+        # Carry the estimate over to the new size so the next decision does
+        # not start from scratch
+        self.ema_ms = self._predicted(index)
+        self.index = index
+        self._over = self._under = 0
+        self._cooling = self.cooldown
+        self.switches += 1
+
+    def stats(self):
+        return {'imgsz': self.imgsz, 'ema_ms': self.ema_ms or 0.0, 'budget_ms': self.budget_ms,
+                'switches': self.switches}
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Inference Benchmark Suite
+Time the image, webcam, drawing and summary hot paths on synthetic frames,
+report latency percentiles, throughput and peak RSS, and compare the
+results against a stored baseline to flag regressions
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.detections import Detections
+from src.inference import DetectionResult, build_model, draw_detections, get_detection_summary, predict_image
+from src.render import Renderer, class_label
+
+RESOLUTIONS = {"480p": (480, 640), "720p": (720, 1280), "1080p": (1080, 1920)}
+DENSITIES = (0, 10, 100, 500)
+DEFAULT_RESULTS = "benchmarks/results.json"
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+
+def load_benchmark_model(model_path: str, backend: str = "pytorch", seed: int = 0):
+    """
+    The trained model when it exists, otherwise a YOLOv8n built from its yaml
+    config with seeded random weights so the suite also runs offline.
+    """
+    if os.path.exists(model_path):
+        return build_model(model_path, backend), model_path
+    import torch
+    from ultralytics import YOLO
+    print(f"⚠️ {model_path} not found, using YOLOv8n with random weights")
+    torch.manual_seed(seed)
+    return YOLO("yolov8n.yaml"), "yolov8n.yaml (random weights)"
+
+def synthetic_frame(shape, seed: int = 0):
+    """A noise frame with a few solid rectangles, BGR uint8."""
+    rng = np.random.default_rng(seed)
+    h, w = shape
+    frame = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+    for _ in range(8):
+        x, y = int(rng.integers(0, w - 64)), int(rng.integers(0, h - 64))
+        frame[y:y + int(rng.integers(32, 64)), x:x + int(rng.integers(32, 64))] = rng.integers(0, 256, 3)
+    return frame
+
+def synthetic_detections(count: int, shape, num_classes: int, seed: int = 0):
+    """count random boxes inside a frame of the given (height, width)."""
+    rng = np.random.default_rng(seed)
+    h, w = shape
+    xy = rng.uniform(0, [w - 40, h - 40], (count, 2))
+    wh = rng.uniform(20, 200, (count, 2))
+    xyxy = np.concatenate([xy, np.minimum(xy + wh, [w, h])], axis=1)
+    return Detections(xyxy, rng.uniform(0.25, 1.0, count), rng.integers(0, num_classes, count))
+
+def raw_results(detections, frame, names):
+    """Wrap detections in an ultralytics Results list, as model() returns it."""
+    import torch
+    from ultralytics.engine.results import Results
+    data = np.concatenate([detections.xyxy, detections.conf[:, None], detections.cls[:, None]], axis=1)
+    return [Results(frame, path="", names=names, boxes=torch.from_numpy(data.astype(np.float32)))]
+
+def legacy_draw(img, detections, names):
+    """The per-box rectangle/putText loop the Renderer replaced, kept as a reference."""
+    ids = detections.ids
+    for i, (box, conf, cls) in enumerate(zip(detections.xyxy.astype(int).tolist(),
+                                             detections.conf.tolist(), detections.cls.tolist())):
+        x1, y1, x2, y2 = box
+        label = class_label(names, cls)
+        color = (0, 255, 0) if 'NO-' not in label else (0, 0, 255)
+        text = f'{label} {conf:.2f}' if ids is None else f'#{ids[i]} {label} {conf:.2f}'
+        cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(img, text, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+    return img
+
+def time_path(fn, iterations: int, warmup: int = 3, repeat: int = 1):
+    """
+    Latency percentiles in ms and throughput in calls/s of fn(). Each sample
+    averages repeat back-to-back calls, which keeps timer noise out of paths
+    that take microseconds.
+    """
+    for _ in range(warmup):
+        fn()
+    times = np.empty(iterations)
+    started = time.perf_counter()
+    for i in range(iterations):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        times[i] = (time.perf_counter() - start) * 1000 / repeat
+    elapsed = time.perf_counter() - started
+    return {
+        "iterations": iterations * repeat,
+        "mean_ms": float(times.mean()),
+        "p50_ms": float(np.percentile(times, 50)),
+        "p95_ms": float(np.percentile(times, 95)),
+        "p99_ms": float(np.percentile(times, 99)),
+        "throughput_per_s": iterations * repeat / elapsed,
+    }
+
+def _rss_status():
+    """(VmRSS, VmHWM) of this process in MB from /proc/self/status."""
+    fields = {}
+    with open("/proc/self/status", "r") as f:
+        for line in f:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                fields[line.split(":")[0]] = int(line.split()[1]) / 1024
+    return fields["VmRSS"], fields["VmHWM"]
+
+def peak_memory(fn, runs: int = 2):
+    """
+    Process RSS high-water mark in MB while running fn(), and how far it rose
+    above the resident size before the call. Unlike tracemalloc this includes
+    torch's and OpenCV's native allocations. The mark is reset through
+    /proc/self/clear_refs, so this needs Linux; elsewhere both are None.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        before, _ = _rss_status()
+    except OSError:
+        return None, None
+    for _ in range(runs):
+        fn()
+    _, peak = _rss_status()
+    return peak, max(peak - before, 0.0)
+
+def benchmark_cases(model, resolutions, densities):
+    """(name, fn) for every path, resolution and box density."""
+    from PIL import Image
+    from av.video.frame import VideoFrame
+    from src.webcam import YOLOVideoTransformer
+
+    names = model.names
+    transformer = YOLOVideoTransformer()
+    transformer.model = model
+    cases = []
+    for label in resolutions:
+        shape = RESOLUTIONS[label]
+        frame = synthetic_frame(shape)
+        image = Image.fromarray(frame[:, :, ::-1])
+        video_frame = VideoFrame.from_ndarray(frame, format="bgr24")
+        cases.append((f"predict_image/{label}", lambda image=image: predict_image(model, image)))
+        cases.append((f"recv/{label}", lambda video_frame=video_frame: transformer.recv(video_frame)))
+        for count in densities:
+            detections = synthetic_detections(count, shape, len(names))
+            cases.append((f"draw/{label}/{count}", lambda frame=frame, detections=detections:
+                          draw_detections(frame.copy(), detections, names)))
+            cases.append((f"draw_legacy/{label}/{count}", lambda frame=frame, detections=detections:
+                          legacy_draw(frame.copy(), detections, names)))
+            # Same detections every frame, as between detector runs in a stream
+            renderer = Renderer(reuse=True)
+            cases.append((f"draw_reuse/{label}/{count}", lambda frame=frame, detections=detections, renderer=renderer:
+                          draw_detections(frame.copy(), detections, names, renderer=renderer)))
+    for count in densities:
+        shape = RESOLUTIONS[resolutions[0]]
+        frame = synthetic_frame(shape)
+        detections = synthetic_detections(count, shape, len(names))
+        result = DetectionResult(frame, detections, names, {})
+        results = raw_results(detections, frame, names)
+        cases.append((f"summary/{count}", lambda result=result: get_detection_summary(result)))
+        cases.append((f"summary_raw/{count}", lambda results=results: get_detection_summary(results)))
+    return cases
+
+def run_suite(model, iterations: int = 30, resolutions=tuple(RESOLUTIONS), densities=DENSITIES):
+    """Time every case; samples of the cheap paths average many calls."""
+    results = {}
+    for name, fn in benchmark_cases(model, list(resolutions), densities):
+        repeat = 1 if name.startswith(("predict_image", "recv")) else 20 if name.startswith("draw") else 200
+        print(f"⏱️ {name}")
+        results[name] = time_path(fn, iterations, repeat=repeat)
+        results[name]["peak_rss_mb"], results[name]["peak_growth_mb"] = peak_memory(fn)
+    return results
+
+def environment(model_source: str):
+    """What the numbers were measured on, stored with the results."""
+    import torch
+    import ultralytics
+    return {
+        "model": model_source,
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "ultralytics": ultralytics.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "torch_threads": torch.get_num_threads(),
+    }
+
+def compare(results, baseline, tolerance: float = 0.2, metric: str = "p50_ms", min_delta_ms: float = 0.05):
+    """
+    Cases whose metric is more than tolerance slower than the baseline,
+    ignoring differences below min_delta_ms that are within timer noise.
+    """
+    regressions = []
+    for name, stats in results.items():
+        reference = baseline.get(name)
+        if (reference and stats[metric] > reference[metric] * (1 + tolerance)
+                and stats[metric] - reference[metric] > min_delta_ms):
+            regressions.append((name, reference[metric], stats[metric]))
+    return regressions
+
+def print_results(results, baseline=None):
+    """Print the results table, with the change against the baseline when given."""
+    print(f"\n{'Path':<26}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'per s':>10}{'RSS MB':>10}{'+MB':>8}"
+          f"{'vs base':>10}")
+    print("-" * 94)
+    for name, stats in results.items():
+        change = ""
+        if baseline and name in baseline and baseline[name]["p50_ms"] > 0:
+            change = f"{stats['p50_ms'] / baseline[name]['p50_ms'] - 1:+.0%}"
+        peak, growth = stats.get("peak_rss_mb"), stats.get("peak_growth_mb")
+        memory = f"{peak:>10.0f}{growth:>8.1f}" if peak is not None else f"{'-':>10}{'-':>8}"
+        print(f"{name:<26}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}"
+              f"{stats['throughput_per_s']:>10.1f}{memory}{change:>10}")
+    print("-" * 94)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the inference, drawing and summary hot paths")
+    parser.add_argument("--model", type=str, default="app/models/best.pt",
+                        help="Path to model weights (YOLOv8n with random weights when missing)")
+    parser.add_argument("--backend", type=str, default="pytorch", help="Inference backend (pytorch, onnx, openvino)")
+    parser.add_argument("--iterations", type=int, default=30, help="Timed samples per path")
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    parser.add_argument("--densities", type=int, nargs="+", default=list(DENSITIES), help="Boxes per frame")
+    parser.add_argument("--threads", type=int, default=None, help="torch threads (default: torch's choice)")
+    parser.add_argument("--output", type=str, default=DEFAULT_RESULTS, help="Where to write the JSON results")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Also store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p50 slow-down before flagging")
+    parser.add_argument("--min-delta", type=float, default=0.05, help="Ignore p50 differences below this many ms")
+
+    args = parser.parse_args()
+
+    print("🎯 AI CCTV Surveillance - Benchmark Suite")
+    print("=" * 50)
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+    try:
+        model, model_source = load_benchmark_model(args.model, args.backend)
+        results = run_suite(model, args.iterations, args.resolutions, args.densities)
+    except Exception as e:
+        print(f"❌ Error during benchmark: {e}")
+        sys.exit(1)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(model_source),
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "results": results,
+    }
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)["results"]
+    print_results(results, baseline)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📁 Results saved to {args.output} (max RSS {report['max_rss_mb']:.0f} MB)")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📌 Baseline saved to {args.baseline}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance, min_delta_ms=args.min_delta)
+        for name, before, after in regressions:
+            print(f"❌ Regression in {name}: p50 {before:.2f} ms -> {after:.2f} ms")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.tolerance:.0%} against {args.baseline}")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Inference Client
+Thin client for src/server.py returning the same DetectionResult objects as
+the in-process predict functions, plus a small load test for the server
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.detections import Detections
+from src.inference import DetectionResult, draw_detections
+from src.server import DEFAULT_PORT, decode_image, encode_image
+
+class InferenceClient:
+    """
+    Call a local inference server. Images are sent losslessly as PNG by
+    default so detections match running the model in-process; boxes are
+    drawn locally unless the server's annotated JPEG is requested. A 503
+    (server loading or at its admission limit) is retried with backoff.
+    """
+    def __init__(self, url=f"http://127.0.0.1:{DEFAULT_PORT}", timeout=60.0, retries=5, image_format="PNG"):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.image_format = image_format
+
+    def _request(self, path, payload=None, timeout=None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        for attempt in range(self.retries + 1):
+            request = urllib.request.Request(self.url + path, data=data,
+                                             headers={"Content-Type": "application/json"} if data else {})
+            try:
+                with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                    return json.loads(response.read())
+            except urllib.error.HTTPError as e:
+                body = e.read()
+                if e.code == 503 and attempt < self.retries:
+                    time.sleep(float(e.headers.get("Retry-After", 1)) * (attempt + 1) / 2)
+                    continue
+                try:
+                    message = json.loads(body).get("error", body)
+                except ValueError:
+                    message = body
+                raise RuntimeError(f"Inference server returned {e.code}: {message}") from None
+
+    def health(self, timeout=2.0):
+        """
+        The server's /healthz document; status 'unreachable' when it cannot
+        be reached.
+        """
+        request = urllib.request.Request(self.url + "/healthz")
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return json.loads(e.read())
+        except (urllib.error.URLError, OSError) as e:
+            return {"status": "unreachable", "error": str(e)}
+
+    def _encode(self, image):
+        return encode_image(image.convert("RGB") if isinstance(image, Image.Image) else image, self.image_format)
+
+    def _result(self, image, payload, annotate, zone_filter=None):
+        names = payload["names"]
+        detections = Detections.from_dict(payload["detections"])
+        if annotate:
+            img_array = np.array(decode_image(payload["annotated_jpeg"]).convert("RGB"))
+        else:
+            img_array = np.array(image.convert("RGB")) if isinstance(image, Image.Image) else image
+            if zone_filter is not None:
+                zone_filter.draw(img_array)
+            draw_detections(img_array, detections, names)
+        return DetectionResult(img_array, detections, names, payload["timings"])
+
+    def detect(self, image, zone_filter=None, annotate=False):
+        """
+        Detect on one PIL image (or array) and return a DetectionResult, like
+        detect_image. With a zone_filter only its zones are analysed.
+        """
+        payload = {"image": self._encode(image), "annotate": annotate}
+        if zone_filter is not None:
+            payload["zones"] = json.loads(zone_filter.signature)
+        return self._result(image, self._request("/detect", payload), annotate, zone_filter)
+
+    def detect_batch(self, images, batch_size=8, annotate=False):
+        """
+        Yield one DetectionResult per image, in order, sending batch_size
+        images per request, like predict_batch.
+        """
+        for start in range(0, len(images), batch_size):
+            chunk = images[start:start + batch_size]
+            response = self._request("/batch", {"images": [self._encode(image) for image in chunk],
+                                                "annotate": annotate})
+            for image, payload in zip(chunk, response["results"]):
+                yield self._result(image, payload, annotate)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send images to the inference server, or load-test it")
+    parser.add_argument("images", nargs="*", help="Images to detect on (default: synthetic frames)")
+    parser.add_argument("--url", type=str, default=f"http://127.0.0.1:{DEFAULT_PORT}", help="Server URL")
+    parser.add_argument("--clients", type=int, default=1, help="Concurrent clients for the load test")
+    parser.add_argument("--requests", type=int, default=10, help="Requests per client for the load test")
+    parser.add_argument("--annotate", action="store_true", help="Ask the server for annotated JPEGs")
+    parser.add_argument("--retries", type=int, default=5, help="Retries on 503 before giving up")
+
+    args = parser.parse_args()
+
+    print("🎯 AI CCTV Surveillance - Inference Client")
+    print("=" * 50)
+
+    client = InferenceClient(args.url, retries=args.retries)
+    health = client.health()
+    if health["status"] not in ("ready", "swapping"):
+        print(f"❌ Server not ready: {health['status']} {health.get('error') or ''}")
+        sys.exit(1)
+    print(f"✅ Server ready, model {health['model_version']}")
+
+    if args.images:
+        images = [Image.open(path) for path in args.images]
+        for path, result in zip(args.images, client.detect_batch(images, annotate=args.annotate)):
+            print(f"📸 {path}: {len(result)} detections {result.counts}")
+        sys.exit(0)
+
+    from src.benchmark import synthetic_frame
+    frames = [synthetic_frame((480, 640), seed) for seed in range(4)]
+    latencies, failures = [], []
+    lock = threading.Lock()
+
+    run_token = int(np.random.default_rng().integers(2**32))
+
+    def unique_frame(number):
+        # The server caches results by content, so every request stamps a
+        # per-run token and its number into the first pixels; the load test
+        # then measures batching and admission control, not cache hits
+        frame = frames[number % len(frames)].copy()
+        frame[0, :8, 0] = np.frombuffer(np.array([run_token, number], dtype=np.uint32).tobytes(), dtype=np.uint8)
+        return frame
+
+    def run(index):
+        for i in range(args.requests):
+            frame = unique_frame(index * args.requests + i)
+            start = time.perf_counter()
+            try:
+                client.detect(frame, annotate=args.annotate)
+            except RuntimeError as e:
+                with lock:
+                    failures.append(str(e))
+                continue
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    before = health
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(args.clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    after = client.health()
+
+    if latencies:
+        print(f"📊 {len(latencies)} requests in {elapsed:.1f}s: {len(latencies) / elapsed:.1f} req/s, "
+              f"p50 {np.percentile(latencies, 50):.0f} ms, p95 {np.percentile(latencies, 95):.0f} ms")
+    if failures:
+        print(f"⚠️ {len(failures)} requests failed, e.g. {failures[0]}")
+    requests = after["scheduler"]["requests"] - before["scheduler"]["requests"]
+    batches = after["scheduler"]["batches"] - before["scheduler"]["batches"]
+    print(f"🧺 Server: {requests} frames through the model in {batches} batches "
+          f"(mean batch {requests / batches if batches else 0.0:.1f}), "
+          f"{after['rejected'] - before['rejected']} requests answered 503")
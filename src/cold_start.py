@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Time-to-First-Detection Report
+Measure how long a fresh process takes to render the app and return its first
+detection, with the old eager start-up and with lazy imports plus warm-up
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+STARTED = time.perf_counter()
+
+# What app/portfolio_app.py imported at module level before imports were made lazy
+EAGER_IMPORTS = ["plotly.express", "cv2", "ultralytics", "streamlit_webrtc", "av"]
+
+def first_detection(model, image):
+    """Latency in ms of one detect_image call."""
+    from src.inference import detect_image
+    start = time.perf_counter()
+    detect_image(model, image)
+    return (time.perf_counter() - start) * 1000
+
+def test_image(image_path: str = None):
+    """The image to detect on, or a synthetic 1280x720 frame."""
+    import numpy as np
+    from PIL import Image
+    if image_path:
+        return Image.open(image_path)
+    return Image.fromarray(np.random.default_rng(0).integers(0, 256, (720, 1280, 3), dtype=np.uint8))
+
+def measure(mode: str, model_path: str, backend: str, image_path: str = None):
+    """
+    Run one start-up in this process. 'before' imports everything up front
+    and detects on a cold model; 'after' imports only what the first page
+    needs, then loads and warms the model the way the app's ModelLoader does.
+    """
+    import importlib
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    if mode == "before":
+        for name in EAGER_IMPORTS:
+            importlib.import_module(name)
+    from src.inference import ModelLoader, build_model
+    page_ready = time.perf_counter() - STARTED
+
+    image = test_image(image_path)
+    if mode == "before":
+        model = build_model(model_path, backend)
+        model_ready = time.perf_counter() - STARTED
+    else:
+        loader = ModelLoader(model_path, backend=backend)
+        loader.start()
+        model = loader.wait()
+        if model is None:
+            raise RuntimeError(f"Model loading failed: {loader.error}")
+        model_ready = time.perf_counter() - STARTED
+    latency = first_detection(model, image)
+    return {
+        "mode": mode,
+        "page_ready_s": page_ready,
+        "model_ready_s": model_ready,
+        "first_detection_ms": latency,
+        "second_detection_ms": first_detection(model, image),
+        "time_to_first_detection_s": time.perf_counter() - STARTED,
+    }
+
+def run_fresh(mode: str, model_path: str, backend: str, image_path: str = None):
+    """Measure one mode in a new interpreter so nothing is imported or cached yet."""
+    command = [sys.executable, os.path.abspath(__file__), "--child", mode, "--model", model_path, "--backend", backend]
+    if image_path:
+        command += ["--image", image_path]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def print_report(runs):
+    """Print the before vs. after table, median over the repeats."""
+    import numpy as np
+    rows = [("page_ready_s", "App can render (s)", 2), ("model_ready_s", "Model ready (s)", 2),
+            ("first_detection_ms", "First detection (ms)", 1), ("second_detection_ms", "Second detection (ms)", 1),
+            ("time_to_first_detection_s", "Time to first det. (s)", 2)]
+    print("\n📊 Cold start: eager vs. lazy + warm-up")
+    print("-" * 62)
+    print(f"{'Metric':<26}{'Before':>12}{'After':>12}{'Delta':>12}")
+    print("-" * 62)
+    for key, label, digits in rows:
+        before = float(np.median([run[key] for run in runs["before"]]))
+        after = float(np.median([run[key] for run in runs["after"]]))
+        print(f"{label:<26}{before:>12.{digits}f}{after:>12.{digits}f}{after - before:>+12.{digits}f}")
+    print("-" * 62)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report time-to-first-detection before and after warm-up")
+    parser.add_argument("--model", type=str, default="app/models/best.pt", help="Path to model weights")
+    parser.add_argument("--backend", type=str, default="pytorch", help="Inference backend (pytorch, onnx, openvino)")
+    parser.add_argument("--image", type=str, default=None, help="Image for the first detection (default: synthetic frame)")
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh processes per mode")
+    parser.add_argument("--output", type=str, default=None, help="Write all runs as JSON")
+    parser.add_argument("--child", choices=["before", "after"], default=None, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.model, args.backend, args.image)))
+        sys.exit(0)
+
+    print("🎯 AI CCTV Surveillance - Cold Start Report")
+    print("=" * 50)
+
+    runs = {"before": [], "after": []}
+    try:
+        for i in range(args.repeats):
+            for mode in runs:
+                print(f"⏱️ Run {i + 1}/{args.repeats}: {mode}")
+                runs[mode].append(run_fresh(mode, args.model, args.backend, args.image))
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Error during measurement:\n{e.stderr}")
+        sys.exit(1)
+
+    print_report(runs)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(runs, f, indent=2)
+        print(f"📁 Report saved to {args.output}")
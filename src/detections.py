@@ -0,0 +1,132 @@
+import json
+
+import numpy as np
+
+class Detections:
+    """
+    Detections of one image held in contiguous NumPy arrays: xyxy boxes
+    (N, 4) float32, confidences (N,) float32, class ids (N,) int64 and
+    optional track ids (N,) int64.
+
+    Built once per result with a single device-to-host copy, then counted,
+    filtered and serialised with vectorised operations instead of per-box
+    Python loops.
+    """
+    __slots__ = ('xyxy', 'conf', 'cls', 'ids')
+
+    def __init__(self, xyxy, conf, cls, ids=None):
+        self.xyxy = np.ascontiguousarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.conf = np.ascontiguousarray(conf, dtype=np.float32).reshape(-1)
+        self.cls = np.ascontiguousarray(cls, dtype=np.int64).reshape(-1)
+        self.ids = None if ids is None else np.ascontiguousarray(ids, dtype=np.int64).reshape(-1)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros((0, 4)), np.zeros(0), np.zeros(0))
+
+    @classmethod
+    def from_result(cls, result):
+        """
+        Build from one ultralytics Results object.
+        """
+        boxes = getattr(result, 'boxes', None)
+        if boxes is None or len(boxes) == 0:
+            return cls.empty()
+        # boxes.data rows are (x1, y1, x2, y2, [track_id,] conf, cls)
+        data = boxes.data.cpu().numpy()
+        ids = data[:, 4] if data.shape[1] == 7 else None
+        return cls(data[:, :4], data[:, -2], data[:, -1], ids)
+
+    @classmethod
+    def from_results(cls, results):
+        """
+        Build from the first entry of an ultralytics results list.
+        """
+        if not results or len(results) == 0:
+            return cls.empty()
+        return cls.from_result(results[0])
+
+    @classmethod
+    def from_dict(cls, records):
+        """
+        Rebuild from the output of to_dict().
+        """
+        if not records:
+            return cls.empty()
+        ids = [r['id'] for r in records] if all('id' in r for r in records) else None
+        return cls([r['box'] for r in records], [r['confidence'] for r in records],
+                   [r['class_id'] for r in records], ids)
+
+    @classmethod
+    def concat(cls, items):
+        items = list(items)
+        if not items:
+            return cls.empty()
+        ids = None
+        if all(d.ids is not None for d in items):
+            ids = np.concatenate([d.ids for d in items])
+        return cls(np.concatenate([d.xyxy for d in items]), np.concatenate([d.conf for d in items]),
+                   np.concatenate([d.cls for d in items]), ids)
+
+    def __len__(self):
+        return len(self.cls)
+
+    def __getitem__(self, index):
+        """
+        Select detections with a boolean mask, index array or slice.
+        """
+        return Detections(self.xyxy[index], self.conf[index], self.cls[index],
+                          None if self.ids is None else self.ids[index])
+
+    def filter(self, classes=None, min_conf=None):
+        """
+        Keep detections of the given class ids and/or at least min_conf.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        if classes is not None:
+            keep &= np.isin(self.cls, list(classes))
+        if min_conf is not None:
+            keep &= self.conf >= min_conf
+        return self[keep]
+
+    def counts(self, num_classes=0):
+        """
+        Number of detections per class id as an array of length >= num_classes.
+        """
+        return np.bincount(self.cls, minlength=num_classes)
+
+    def class_counts(self, names):
+        """
+        Per-class counts keyed by display name, in class id order, skipping
+        classes with no detections.
+        """
+        counts = self.counts()
+        return {(names[i] if names is not None and i < len(names) else f"Class_{i}"): int(counts[i])
+                for i in np.flatnonzero(counts).tolist()}
+
+    def scaled(self, ratio, pad, shape):
+        """
+        Map boxes from letterboxed coordinates back onto an image of the given
+        (height, width) shape.
+        """
+        xyxy = (self.xyxy - np.array([pad[0], pad[1], pad[0], pad[1]], dtype=np.float32)) / ratio
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, shape[1])
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, shape[0])
+        return Detections(xyxy, self.conf, self.cls, self.ids)
+
+    def to_dict(self, names=None):
+        """
+        List of plain dicts, one per detection, ready for JSON.
+        """
+        labels = [names[c] if names is not None and c < len(names) else str(c) for c in self.cls.tolist()]
+        boxes = np.round(self.xyxy.astype(np.float64), 1).tolist()
+        confs = np.round(self.conf.astype(np.float64), 4).tolist()
+        records = [{'class': label, 'class_id': cls, 'confidence': conf, 'box': box}
+                   for label, cls, conf, box in zip(labels, self.cls.tolist(), confs, boxes)]
+        if self.ids is not None:
+            for record, track_id in zip(records, self.ids.tolist()):
+                record['id'] = track_id
+        return records
+
+    def to_json(self, names=None):
+        return json.dumps(self.to_dict(names))
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Shared-memory Frame Ring
+Fixed-size frame slots in multiprocessing.shared_memory, so a capture process
+writes each frame once and inference and rendering processes read it in place
+through NumPy views; only slot numbers travel through queues. Includes a
+throughput benchmark against pickling frames through multiprocessing.Queue
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+class FrameRing:
+    """
+    A ring of slots frames of one shape and dtype in shared memory, with a
+    reference count and sequence number per slot in a second shared block.
+
+    A producer claims a free slot with acquire() (or write()), fills the
+    NumPy view from frame(slot) (cv2.VideoCapture.read can decode straight
+    into it), then publish()es it for readers consumers and passes the slot
+    number on. Every consumer calls release(slot) when done; at zero the
+    slot is free again. When all slots are held, acquire() returns None and
+    the producer drops the frame rather than blocking the camera.
+
+    Pass the ring to child processes as a Process argument: it reattaches to
+    the same blocks by name. The creating process calls unlink() at the end.
+    """
+    def __init__(self, slots, shape, dtype=np.uint8, context=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self._lock = (context or mp).Lock()
+        self._data = shared_memory.SharedMemory(create=True, size=slots * self.frame_bytes)
+        self._control = shared_memory.SharedMemory(create=True, size=slots * 16)
+        self._owner = True
+        self._attach()
+        self._refcounts[:] = 0
+        self._seq[:] = -1
+        self._next = 0
+        self._published = 0
+
+    def _attach(self):
+        self._frames = np.ndarray((self.slots,) + self.shape, dtype=self.dtype, buffer=self._data.buf)
+        self._refcounts = np.ndarray(self.slots, dtype=np.int64, buffer=self._control.buf)
+        self._seq = np.ndarray(self.slots, dtype=np.int64, buffer=self._control.buf, offset=self.slots * 8)
+
+    def __getstate__(self):
+        return {"slots": self.slots, "shape": self.shape, "dtype": self.dtype.str, "lock": self._lock,
+                "data": self._data.name, "control": self._control.name}
+
+    def __setstate__(self, state):
+        self.slots, self.shape, self.dtype = state["slots"], state["shape"], np.dtype(state["dtype"])
+        self.frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self._lock = state["lock"]
+        self._data = shared_memory.SharedMemory(name=state["data"])
+        self._control = shared_memory.SharedMemory(name=state["control"])
+        self._owner = False
+        self._attach()
+        self._next = 0
+        self._published = 0
+
+    def acquire(self):
+        """Claim a free slot for writing; None when every slot is still in use."""
+        with self._lock:
+            for i in range(self.slots):
+                slot = (self._next + i) % self.slots
+                if self._refcounts[slot] == 0:
+                    self._refcounts[slot] = 1
+                    self._next = (slot + 1) % self.slots
+                    return slot
+        return None
+
+    def frame(self, slot):
+        """NumPy view of a slot, no copy."""
+        return self._frames[slot]
+
+    def publish(self, slot, readers=1):
+        """
+        Hand a written slot to readers consumers. Returns the slot's sequence
+        number, which readers can compare with seq(slot) to detect reuse.
+        """
+        with self._lock:
+            self._published += 1
+            seq = self._seq[slot] = (os.getpid() << 32) | self._published
+            self._refcounts[slot] = readers
+        return int(seq)
+
+    def write(self, img, readers=1):
+        """
+        Copy img into a free slot and publish it: the frame's only copy.
+        Returns (slot, seq), or None when the ring is full.
+        """
+        slot = self.acquire()
+        if slot is None:
+            return None
+        np.copyto(self._frames[slot], img)
+        return slot, self.publish(slot, readers)
+
+    def seq(self, slot):
+        return int(self._seq[slot])
+
+    def release(self, slot):
+        """Drop one reference; the slot is reused once all readers released it."""
+        with self._lock:
+            if self._refcounts[slot] <= 0:
+                raise ValueError(f"Slot {slot} released more often than it was published")
+            self._refcounts[slot] -= 1
+
+    def in_use(self):
+        with self._lock:
+            return int(np.count_nonzero(self._refcounts))
+
+    def close(self):
+        """Detach this process's views and mappings."""
+        self._frames = self._refcounts = self._seq = None
+        self._data.close()
+        self._control.close()
+
+    def unlink(self):
+        """Free the shared memory; only the creating process does this."""
+        self.close()
+        if self._owner:
+            self._data.unlink()
+            self._control.unlink()
+
+def _produce_queue(frames, shape, count):
+    frame = np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+    for _ in range(count):
+        frames.put(frame)
+    frames.put(None)
+
+def _touch(frame):
+    # Both consumers read every pixel once, as a detector's preprocessing
+    # would, so neither transport is credited for data it never touched
+    return int(frame.sum(dtype=np.uint64))
+
+def _consume_queue(frames, done):
+    # Timed from the first frame so process start-up is not counted
+    frame = frames.get()
+    start, received = time.perf_counter(), 0
+    while frame is not None:
+        _touch(frame)
+        received += 1
+        frame = frames.get()
+    done.put((received - 1) / (time.perf_counter() - start))
+
+def _produce_ring(ring, slots, count):
+    frame = np.random.default_rng(0).integers(0, 256, ring.shape, dtype=np.uint8)
+    sent = 0
+    while sent < count:
+        written = ring.write(frame)
+        if written is None:
+            # Consumer is behind: the benchmark waits instead of dropping
+            time.sleep(0.0001)
+            continue
+        slots.put(written)
+        sent += 1
+    slots.put(None)
+    ring.close()
+
+def _consume_ring(ring, slots, done):
+    item = slots.get()
+    start, received = time.perf_counter(), 0
+    while item is not None:
+        slot, seq = item
+        if ring.seq(slot) != seq:
+            raise RuntimeError(f"Slot {slot} was overwritten before it was read")
+        _touch(ring.frame(slot))
+        received += 1
+        ring.release(slot)
+        item = slots.get()
+    done.put((received - 1) / (time.perf_counter() - start))
+    ring.close()
+
+def benchmark_transport(transport, shape, count, slots=8, context=None):
+    """Frames per second moving count frames of shape from one process to another."""
+    context = context or mp.get_context("spawn")
+    queue, done = context.Queue(maxsize=slots), context.Queue()
+    ring = FrameRing(slots, shape, context=context) if transport == "shm" else None
+    if ring is None:
+        producer = context.Process(target=_produce_queue, args=(queue, shape, count))
+        consumer = context.Process(target=_consume_queue, args=(queue, done))
+    else:
+        producer = context.Process(target=_produce_ring, args=(ring, queue, count))
+        consumer = context.Process(target=_consume_ring, args=(ring, queue, done))
+    consumer.start()
+    producer.start()
+    fps = done.get()
+    producer.join()
+    consumer.join()
+    if ring is not None:
+        ring.unlink()
+    return fps
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark shared-memory frame transport against multiprocessing.Queue")
+    parser.add_argument("--frames", type=int, default=300, help="Frames moved per measurement")
+    parser.add_argument("--slots", type=int, default=8, help="Ring slots (and queue depth)")
+    parser.add_argument("--resolutions", nargs="+", default=["480p", "720p", "1080p"],
+                        choices=["480p", "720p", "1080p"])
+
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from src.benchmark import RESOLUTIONS
+
+    print("🎯 AI CCTV Surveillance - Frame Transport Benchmark")
+    print("=" * 50)
+    print(f"\n{'Resolution':<12}{'Queue FPS':>12}{'SHM FPS':>12}{'Queue MB/s':>12}{'SHM MB/s':>12}{'Speed-up':>10}")
+    print("-" * 70)
+    for label in args.resolutions:
+        shape = RESOLUTIONS[label] + (3,)
+        megabytes = np.prod(shape) / 2**20
+        queued = benchmark_transport("queue", shape, args.frames, args.slots)
+        shared = benchmark_transport("shm", shape, args.frames, args.slots)
+        print(f"{label:<12}{queued:>12.0f}{shared:>12.0f}{queued * megabytes:>12.0f}{shared * megabytes:>12.0f}"
+              f"{shared / queued:>9.1f}x")
+    print("-" * 70)
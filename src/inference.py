@@ -1,115 +1,538 @@
 import cv2
 import numpy as np
 from PIL import Image
-from ultralytics import YOLO
 import streamlit as st
+import hashlib
+import math
+import os
 import time
-from streamlit_webrtc import webrtc_streamer, VideoTransformerBase
-import av
-from av.video.frame import VideoFrame
+import threading
+from collections import OrderedDict
+from src.detections import Detections
+from src.metrics import METRICS
+from src.render import Renderer
+from src.tiling import tile_grid, select_tiles, merge_detections
+
+# ultralytics (torch) and the webcam stack (streamlit_webrtc, av) are slow to
+# import, so they are only pulled in when a model is built or the webcam page
+# is opened. The webcam classes live in src.webcam and stay reachable here.
+WEBCAM_NAMES = ('AsyncInferenceWorker', 'YOLOVideoTransformer', 'get_or_create_transformer', 'predict_webcam')
+
+def __getattr__(name):
+    if name in WEBCAM_NAMES:
+        from src import webcam
+        return getattr(webcam, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Class names for the PPE dataset
-CLASS_NAMES = ['Hardhat', 'Mask', 'NO-Hardhat', 'NO-Mask', 'NO-Safety Vest', 
+CLASS_NAMES = ['Hardhat', 'Mask', 'NO-Hardhat', 'NO-Mask', 'NO-Safety Vest',
                'Person', 'Safety Cone', 'Safety Vest', 'machinery', 'vehicle']
 
-def load_model(model_path):
+# Inference backends: export format and the artifact name ultralytics writes
+# next to the .pt file. Exported models are driven through the same YOLO()
+# interface, so every predict function works unchanged on top of them.
+BACKENDS = {
+    'pytorch': None,
+    'onnx': {'format': 'onnx', 'suffix': '.onnx'},
+    'openvino': {'format': 'openvino', 'suffix': '_openvino_model'},
+    # Needs calibration data, so it is produced by src/quantize.py rather than on demand
+    'openvino-int8': {'format': 'openvino', 'suffix': '_int8_openvino_model', 'int8': True},
+}
+
+def exported_model_path(model_path, backend):
     """
-    Load the YOLOv8 model from given path.
+    Path of the cached export of model_path for the given backend.
     """
-    try:
+    base, _ = os.path.splitext(model_path)
+    return base + BACKENDS[backend]['suffix']
+
+def ensure_exported(model_path, backend, imgsz=640):
+    """
+    Return the artifact for backend, exporting it from the .pt weights when it
+    is missing or older than them.
+    """
+    if BACKENDS.get(backend) is None:
+        return model_path
+    artifact = exported_model_path(model_path, backend)
+    if os.path.exists(artifact) and os.path.getmtime(artifact) >= os.path.getmtime(model_path):
+        return artifact
+    if BACKENDS[backend].get('int8'):
+        # quantize.py writes the INT8 model next to the weights it is given,
+        # which for a registry version is that version's directory
+        raise FileNotFoundError(f"{artifact} not found, create it with: "
+                                f"python src/quantize.py --weights {model_path} --data <path/to/data.yaml>")
+    print(f"📦 Exporting {model_path} to {backend}...")
+    from ultralytics import YOLO
+    # dynamic axes so predict_batch can feed batches larger than one
+    exported = YOLO(model_path).export(format=BACKENDS[backend]['format'], imgsz=imgsz, dynamic=True)
+    return exported or artifact
+
+def build_model(model_path, backend='pytorch', imgsz=640):
+    """
+    Build a model for the given backend without any UI side effects.
+    Raises on failure.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {', '.join(BACKENDS)}")
+    from ultralytics import YOLO
+    if BACKENDS[backend] is None:
         model = YOLO(model_path)
-        st.success(f"✅ Model loaded successfully from {model_path}")
+    else:
+        model = YOLO(ensure_exported(model_path, backend, imgsz), task='detect')
+    # Identifies the weights in ResultCache keys; the registry sets its own version
+    if os.path.exists(model_path):
+        model.model_version = f"{os.path.abspath(model_path)}@{os.path.getmtime(model_path):.0f}:{backend}"
+    return model
+
+def load_model(model_path, backend='pytorch'):
+    """
+    Load the YOLOv8 model from given path. With backend 'onnx' or 'openvino'
+    the weights are exported once and the cached artifact is loaded instead.
+    """
+    try:
+        model = build_model(model_path, backend)
+        st.success(f"✅ Model loaded successfully from {model_path} ({backend})")
         return model
     except Exception as e:
         st.error(f"❌ Error loading model: {e}")
         return None
 
+def warm_up(model, shapes=((640, 640),), runs=2):
+    """
+    Run a few dummy inferences at each (height, width) input shape so the
+    first real request does not pay for lazy initialisation and graph setup.
+    Returns the time it took in seconds.
+    """
+    start = time.perf_counter()
+    for h, w in shapes:
+        dummy = np.zeros((h, w, 3), dtype=np.uint8)
+        for _ in range(runs):
+            model(dummy, imgsz=(h, w), verbose=False)
+    return time.perf_counter() - start
+
+class ModelLoader(threading.Thread):
+    """
+    Build and warm up a model in a background thread so the app can render
+    while it loads. state moves from 'loading' to 'warming' to 'ready', or to
+    'failed' with the exception in error.
+    """
+    def __init__(self, model_path, backend='pytorch', imgsz=640, shapes=None, runs=2):
+        super().__init__(daemon=True)
+        self.model_path = model_path
+        self.backend = backend
+        self.imgsz = imgsz
+        # Square for images and batches, 16:9 for camera streams
+        self.shapes = shapes or [(imgsz, imgsz), rect_shape((720, 1280), imgsz)]
+        self.runs = runs
+        self.model = None
+        self.error = None
+        self.state = 'loading'
+        self.timings = {}
+        self._ready = threading.Event()
+
+    def run(self):
+        try:
+            start = time.perf_counter()
+            model = build_model(self.model_path, self.backend, self.imgsz)
+            self.timings['load'] = time.perf_counter() - start
+            self.state = 'warming'
+            self.timings['warmup'] = warm_up(model, self.shapes, self.runs)
+            self.model = model
+            self.state = 'ready'
+        except Exception as e:
+            self.error = e
+            self.state = 'failed'
+            print(f"[ERROR] Model loading failed: {e}")
+        finally:
+            self._ready.set()
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Block until loading has finished and return the model (None on failure).
+        """
+        self._ready.wait(timeout)
+        return self.model
+
+# Shared renderer for one-off images; streams keep their own with reuse=True
+RENDERER = Renderer()
+
+def draw_detections(img, detections, names, renderer=None):
+    """
+    Draw bounding boxes and labels onto img in place. Track ids, when the
+    detections carry them, are prefixed to the labels.
+    """
+    return (renderer or RENDERER).draw(img, detections, names)
+
+class DetectionResult:
+    """
+    Everything produced by one forward pass over an image: the Detections, the
+    annotated image, per-class counts and per-stage timings in ms.
+    """
+    def __init__(self, image, detections, names, timings):
+        self.image = image
+        self.detections = detections
+        self.names = names
+        self.timings = timings
+        self.counts = detections.class_counts(names)
+
+    def __len__(self):
+        return len(self.detections)
+
+class ResultCache:
+    """
+    Content-addressed cache of Detections. Keys hash the image pixels, the
+    model version and the inference parameters, so a Streamlit rerun over
+    the same upload skips the model. An in-memory LRU holds max_items
+    entries; with disk_dir entries are also kept as .npz files that survive
+    restarts (only for models with a known model_version). The disk tier
+    holds at most max_disk_items files (None for no limit); past that the
+    least recently used files are deleted.
+    """
+    def __init__(self, max_items=256, disk_dir=None, max_disk_items=10000):
+        self.max_items = max_items
+        self.disk_dir = disk_dir
+        self.max_disk_items = max_disk_items
+        self._items = OrderedDict()
+        # Disk keys oldest first, read from the file mtimes on first use
+        self._disk_keys = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+
+    def key(self, img, model, **params):
+        version = getattr(model, 'model_version', None)
+        digest = hashlib.sha256()
+        digest.update(f"{img.shape}{img.dtype}".encode())
+        digest.update(np.ascontiguousarray(img).data)
+        digest.update(repr(sorted(params.items())).encode())
+        # Unversioned models are only cached in memory, per model object
+        digest.update((version or f"unversioned-{id(model)}").encode())
+        return digest.hexdigest(), version is not None
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + '.npz')
+
+    def _disk_index(self):
+        # Called with the lock held
+        if self._disk_keys is None:
+            entries = []
+            for root, _, files in os.walk(self.disk_dir):
+                for name in files:
+                    if name.endswith('.npz') and '.tmp-' not in name:
+                        try:
+                            entries.append((os.stat(os.path.join(root, name)).st_mtime_ns, name[:-4]))
+                        except OSError:
+                            pass
+            self._disk_keys = OrderedDict((key, None) for _, key in sorted(entries))
+        return self._disk_keys
+
+    def _touch_disk(self, key):
+        """
+        Mark a disk entry as most recently used and delete the oldest files
+        while the disk tier is over max_disk_items.
+        """
+        with self._lock:
+            index = self._disk_index()
+            index[key] = None
+            index.move_to_end(key)
+            while self.max_disk_items is not None and len(index) > self.max_disk_items:
+                old, _ = index.popitem(last=False)
+                try:
+                    os.remove(self._disk_path(old))
+                except FileNotFoundError:
+                    # Already removed by another process sharing the directory
+                    pass
+                self.disk_evictions += 1
+
+    def get(self, key):
+        key, persistent = key
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+        if self.disk_dir and persistent and os.path.exists(self._disk_path(key)):
+            try:
+                with np.load(self._disk_path(key)) as data:
+                    detections = Detections(data['xyxy'], data['conf'], data['cls'],
+                                            data['ids'] if 'ids' in data else None)
+            except Exception as e:
+                print(f"[ERROR] Unreadable result cache entry {key}: {e}")
+            else:
+                self._remember(key, detections)
+                try:
+                    # The mtime keeps the use order across restarts
+                    os.utime(self._disk_path(key))
+                except OSError:
+                    pass
+                self._touch_disk(key)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                return detections
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, detections):
+        key, persistent = key
+        self._remember(key, detections)
+        if self.disk_dir and persistent:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            arrays = {'xyxy': detections.xyxy, 'conf': detections.conf, 'cls': detections.cls}
+            if detections.ids is not None:
+                arrays['ids'] = detections.ids
+            # Write then rename so a concurrent reader never sees a partial file
+            tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}.npz"
+            np.savez(tmp, **arrays)
+            os.replace(tmp, path)
+            self._touch_disk(key)
+
+    def _remember(self, key, detections):
+        with self._lock:
+            self._items[key] = detections
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0, 'items': len(self._items),
+                'disk_evictions': self.disk_evictions}
+
+def detect_image(model, image, zone_filter=None, cache=None, draw=True):
+    """
+    Run the model once on a PIL image and return a DetectionResult carrying both
+    the annotated image and the detections used for the summary. With a
+    zone_filter only the configured zones are analysed. With a ResultCache an
+    image seen before is only redrawn. Pass draw=False to skip annotation.
+    """
+    start = time.perf_counter()
+    img_array = np.array(image.convert("RGB"))
+    decode_ms = (time.perf_counter() - start) * 1000
+    key = detections = None
+    if cache is not None:
+        key = cache.key(img_array, model, zones=zone_filter.signature if zone_filter is not None else None)
+        detections = cache.get(key)
+    if detections is not None:
+        timings = {'cache': (time.perf_counter() - start) * 1000}
+    elif zone_filter is not None:
+        detections = zone_filter.detect(model, img_array)
+        timings = {}
+    else:
+        results = model(img_array, verbose=False)
+        detections = Detections.from_results(results)
+        timings = dict(getattr(results[0], 'speed', None) or {}) if results else {}
+    if key is not None and 'cache' not in timings:
+        cache.put(key, detections)
+    names = model.names if hasattr(model, 'names') else None
+
+    draw_start = time.perf_counter()
+    if draw:
+        if zone_filter is not None:
+            zone_filter.draw(img_array)
+        draw_detections(img_array, detections, names)
+    timings['draw'] = (time.perf_counter() - draw_start) * 1000
+    timings['total'] = (time.perf_counter() - start) * 1000
+    timings['decode'] = decode_ms
+    METRICS.observe_timings('image', timings)
+    return DetectionResult(img_array, detections, names, timings)
+
 def predict_image(model, image):
     """
     Predict and return image with bounding boxes for uploaded image.
     """
     try:
-        img_array = np.array(image.convert("RGB"))
-        results = model(img_array)
-
-        # Draw bounding boxes and labels manually
-        if results and len(results) > 0 and hasattr(results[0], 'boxes') and results[0].boxes is not None:
-            boxes = results[0].boxes.xyxy.cpu().numpy()
-            confs = results[0].boxes.conf.cpu().numpy()
-            clss = results[0].boxes.cls.cpu().numpy().astype(int)
-            for box, conf, cls in zip(boxes, confs, clss):
-                x1, y1, x2, y2 = map(int, box)
-                label = model.names[cls] if hasattr(model, 'names') and cls < len(model.names) else str(cls)
-                color = (0, 255, 0) if 'NO-' not in label else (0, 0, 255)
-                cv2.rectangle(img_array, (x1, y1), (x2, y2), color, 2)
-                cv2.putText(img_array, f'{label} {conf:.2f}', (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-            return img_array
-        else:
+        result = detect_image(model, image)
+        if len(result) == 0:
             st.warning("⚠️ No detections found in the image.")
-            return img_array
+        return result.image
     except Exception as e:
         st.error(f"❌ Error during prediction: {e}")
         return np.array(image.convert("RGB"))
 
-class YOLOVideoTransformer(VideoTransformerBase):
+def letterbox(img, new_shape=640, color=(114, 114, 114)):
+    """
+    Resize img to fit new_shape keeping its aspect ratio and pad the rest.
+    Returns the padded image, the scale ratio and the (left, top) padding.
+    """
+    if isinstance(new_shape, int):
+        new_shape = (new_shape, new_shape)
+    h, w = img.shape[:2]
+    r = min(new_shape[0] / h, new_shape[1] / w)
+    new_w, new_h = int(round(w * r)), int(round(h * r))
+    if (new_w, new_h) != (w, h):
+        img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    dw, dh = (new_shape[1] - new_w) / 2, (new_shape[0] - new_h) / 2
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return img, r, (left, top)
+
+def rect_shape(shape, imgsz=640, stride=32):
+    """
+    Smallest stride-aligned (height, width) input that holds a frame of the
+    given shape with its long side scaled to imgsz. A 1920x1080 frame at 640
+    gives (384, 640) instead of a square 640x640.
+    """
+    h, w = shape[:2]
+    r = imgsz / max(h, w)
+    return (math.ceil(h * r / stride) * stride, math.ceil(w * r / stride) * stride)
+
+def predict_batch(model, images, batch_size=8, imgsz=640, draw=True, rect=False, cache=None, path='batch'):
+    """
+    Run the model over a list of PIL images (or NumPy frames, which are used
+    as-is and annotated in place) in fixed-size batches.
+
+    Every image is letterboxed to imgsz so a batch goes through one forward
+    pass. With rect the batch uses the smallest stride-aligned rectangle that
+    fits its images instead of a square, so 16:9 frames carry little padding.
+    imgsz may also be an explicit (height, width). Yields one DetectionResult
+    per image, in input order, as soon as the batch containing it has
+    finished. Pass draw=False to skip annotation. With a ResultCache only the
+    images not seen before go through the model. Stage timings are recorded
+    in METRICS under path.
+    """
+    names = model.names if hasattr(model, 'names') else None
+    for start in range(0, len(images), batch_size):
+        batch_start = time.perf_counter()
+        originals = [image if isinstance(image, np.ndarray) else np.array(image.convert("RGB"))
+                     for image in images[start:start + batch_size]]
+        # Frames handed in as arrays were decoded by the caller
+        decoded = not all(isinstance(image, np.ndarray) for image in images[start:start + batch_size])
+        decode_ms = (time.perf_counter() - batch_start) * 1000 / len(originals)
+        keys = [cache.key(img, model, imgsz=imgsz, rect=rect) if cache is not None else None for img in originals]
+        found = [cache.get(key) if key is not None else None for key in keys]
+        todo = [i for i, detections in enumerate(found) if detections is None]
+
+        computed = {}
+        if todo:
+            input_shape = imgsz
+            if rect and isinstance(imgsz, int):
+                shapes = [rect_shape(originals[i].shape, imgsz) for i in todo]
+                input_shape = (max(h for h, _ in shapes), max(w for _, w in shapes))
+            letterbox_start = time.perf_counter()
+            inputs, meta = [], []
+            for i in todo:
+                padded, ratio, pad = letterbox(originals[i], input_shape)
+                inputs.append(padded)
+                meta.append((ratio, pad))
+            letterbox_ms = (time.perf_counter() - letterbox_start) * 1000 / len(todo)
+
+            results = model(inputs, imgsz=input_shape, verbose=False)
+            for i, result, (ratio, pad) in zip(todo, results, meta):
+                detections = Detections.from_result(result).scaled(ratio, pad, originals[i].shape[:2])
+                timings = dict(getattr(result, 'speed', None) or {})
+                timings['preprocess'] = timings.get('preprocess', 0.0) + letterbox_ms
+                computed[i] = (detections, timings)
+                if keys[i] is not None:
+                    cache.put(keys[i], detections)
+        batch_ms = (time.perf_counter() - batch_start) * 1000
+
+        for i, img_array in enumerate(originals):
+            if i in computed:
+                detections, timings = computed[i]
+            else:
+                detections, timings = found[i], {'cache': batch_ms / len(originals)}
+            draw_start = time.perf_counter()
+            if draw:
+                draw_detections(img_array, detections, names)
+            timings['draw'] = (time.perf_counter() - draw_start) * 1000
+            timings['total'] = batch_ms / len(originals) + timings['draw']
+            if decoded:
+                timings['decode'] = decode_ms
+            METRICS.observe_timings(path, timings)
+            yield DetectionResult(img_array, detections, names, timings)
+
+def predict_tiled(model, image, tile_size=640, overlap=0.2, focus_boxes=None, full_frame=True,
+                  iou=0.5, draw=True):
+    """
+    Sliced inference for high-resolution frames.
+
+    The frame is cut into overlapping tile_size tiles at native resolution so
+    small objects keep their pixels, all tiles go through the model as one
+    batch, and boxes are shifted back to frame coordinates and merged with
+    cross-tile NMS. With focus_boxes only tiles touching those boxes are run;
+    full_frame adds a downscaled whole-frame pass for objects larger than a
+    tile.
+    """
+    start = time.perf_counter()
+    img_array = image if isinstance(image, np.ndarray) else np.array(image.convert("RGB"))
+    shape = img_array.shape[:2]
+    names = model.names if hasattr(model, 'names') else None
+
+    tiles = tile_grid(shape, tile_size, overlap)
+    if focus_boxes is not None:
+        tiles = select_tiles(tiles, focus_boxes)
+    inputs = [np.ascontiguousarray(img_array[y1:y2, x1:x2]) for x1, y1, x2, y2 in tiles.tolist()]
+    mappings = [(1.0, (-x1, -y1)) for x1, y1, _, _ in tiles.tolist()]
+    if full_frame:
+        padded, ratio, pad = letterbox(img_array, tile_size)
+        inputs.append(padded)
+        mappings.append((ratio, pad))
+
+    timings = {}
+    parts = []
+    if inputs:
+        results = model(inputs, imgsz=tile_size, verbose=False)
+        for result, (ratio, pad) in zip(results, mappings):
+            parts.append(Detections.from_result(result).scaled(ratio, pad, shape))
+    detections = merge_detections(Detections.concat(parts), iou=iou)
+    timings['inference'] = (time.perf_counter() - start) * 1000
+
+    draw_start = time.perf_counter()
+    if draw:
+        draw_detections(img_array, detections, names)
+    timings['draw'] = (time.perf_counter() - draw_start) * 1000
+    timings['total'] = (time.perf_counter() - start) * 1000
+    METRICS.observe_timings('tiled', timings)
+    return DetectionResult(img_array, detections, names, timings)
+
+class LatestFrameBuffer:
+    """
+    Single-slot hand-off between a producer and a consumer thread. A new frame
+    replaces any frame that has not been taken yet, so the consumer always sees
+    the newest one and stale frames are dropped.
+    """
     def __init__(self):
-        self.model = None
+        self._cond = threading.Condition()
+        self._item = None
+        self.dropped = 0
 
-    def recv(self, frame):
-        img = frame.to_ndarray(format="bgr24")
-        if self.model is not None:
-            results = self.model(img)
-            if results and len(results) > 0 and hasattr(results[0], 'boxes') and results[0].boxes is not None:
-                boxes = results[0].boxes.xyxy.cpu().numpy()
-                confs = results[0].boxes.conf.cpu().numpy()
-                clss = results[0].boxes.cls.cpu().numpy().astype(int)
-                print(f"[DEBUG] Detected classes: {clss}")
-                print(f"[DEBUG] Confidences: {confs}")
-                for box, conf, cls in zip(boxes, confs, clss):
-                    x1, y1, x2, y2 = map(int, box)
-                    label = self.model.names[cls] if hasattr(self.model, 'names') and cls < len(self.model.names) else str(cls)
-                    color = (0, 255, 0) if 'NO-' not in label else (0, 0, 255)
-                    cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
-                    cv2.putText(img, f'{label} {conf:.2f}', (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-        return VideoFrame.from_ndarray(img, format="bgr24")
-
-def get_or_create_transformer(model):
-    # Always create or update the transformer in session state
-    if "yolo_transformer" not in st.session_state or st.session_state["yolo_transformer"] is None:
-        st.session_state["yolo_transformer"] = YOLOVideoTransformer()
-    st.session_state["yolo_transformer"].model = model
-    return st.session_state["yolo_transformer"]
-
-def predict_webcam(model):
-    st.title("Real-time Webcam Detection")
-
-    webrtc_streamer(
-        key="yolo-webcam",
-        video_transformer_factory=lambda: get_or_create_transformer(model),
-        media_stream_constraints={"video": True, "audio": False},
-        async_transform=True,
-    )
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        with self._cond:
+            if self._item is None:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
 
 def get_detection_summary(results):
     """
-    Get a summary of detections for display.
-    """
-    if not results or len(results) == 0:
-        return "No detections found"
-    
-    result = results[0]
-    if result.boxes is None or len(result.boxes) == 0:
-        return "No detections found"
-    
-    detections = {}
-    for i, box in enumerate(result.boxes.xyxy):
-        if hasattr(result.boxes, 'cls') and len(result.boxes.cls) > i:
-            cls_id = int(result.boxes.cls[i])
-            class_name = CLASS_NAMES[cls_id] if cls_id < len(CLASS_NAMES) else f"Class_{cls_id}"
-            detections[class_name] = detections.get(class_name, 0) + 1
-    
+    Get a summary of detections for display. Accepts either a DetectionResult
+    or a raw ultralytics results list.
+    """
+    if isinstance(results, DetectionResult):
+        detections = results.counts
+    else:
+        detections = Detections.from_results(results).class_counts(CLASS_NAMES)
+
     summary = []
     for class_name, count in detections.items():
         summary.append(f"{class_name}: {count}")
-    
+
     return ", ".join(summary) if summary else "No detections found"
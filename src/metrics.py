@@ -0,0 +1,138 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in ms, Prometheus style (+Inf is implicit)
+LATENCY_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 15, 25, 35, 50, 75, 100, 150, 200, 300, 500, 750, 1000, 2500, 5000)
+
+# Stages in pipeline order, used to sort reports
+STAGES = ('decode', 'cache', 'queue', 'preprocess', 'inference', 'postprocess', 'detect', 'draw', 'encode', 'total')
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram: an observation is one bisect and three
+    increments, so it is cheap enough for every frame.
+    """
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """
+        Estimate a quantile by linear interpolation inside its bucket.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+class StageMetrics:
+    """
+    Per-stage latency histograms for every predict path ('image', 'batch',
+    'webcam', ...), rendered in the Prometheus text format.
+    """
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, path, stage, ms):
+        key = (path, stage)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(ms)
+
+    def observe_timings(self, path, timings):
+        """
+        Record a timings dict (stage -> ms) such as DetectionResult.timings or
+        an ultralytics result.speed.
+        """
+        for stage, ms in timings.items():
+            if ms is not None:
+                self.observe(path, stage, ms)
+
+    @contextmanager
+    def timer(self, path, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(path, stage, (time.perf_counter() - start) * 1000)
+
+    def _sorted(self):
+        with self._lock:
+            items = list(self._histograms.items())
+        order = {stage: i for i, stage in enumerate(STAGES)}
+        return sorted(items, key=lambda item: (item[0][0], order.get(item[0][1], len(order)), item[0][1]))
+
+    def summary(self):
+        """
+        One row per (path, stage) with count, mean, p50 and p95 in ms.
+        """
+        return [{'path': path, 'stage': stage, 'count': h.count, 'mean_ms': h.sum / max(h.count, 1),
+                 'p50_ms': h.quantile(0.5), 'p95_ms': h.quantile(0.95)}
+                for (path, stage), h in self._sorted()]
+
+    def render(self):
+        """
+        Prometheus text exposition of all histograms.
+        """
+        name = 'cctv_stage_latency_ms'
+        lines = [f'# HELP {name} Latency of each inference pipeline stage in milliseconds.',
+                 f'# TYPE {name} histogram']
+        for (path, stage), h in self._sorted():
+            labels = f'path="{path}",stage="{stage}"'
+            cumulative = 0
+            for bound, n in zip(self.buckets, h.counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.count}')
+            lines.append(f'{name}_sum{{{labels}}} {h.sum:.3f}')
+            lines.append(f'{name}_count{{{labels}}} {h.count}')
+        return '\n'.join(lines) + '\n'
+
+# Shared by every predict path in the process
+METRICS = StageMetrics()
+
+def serve_metrics(port=9464, host='127.0.0.1', metrics=METRICS):
+    """
+    Serve metrics.render() at http://host:port/metrics from a daemon thread.
+    Returns the server; call shutdown() to stop it.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
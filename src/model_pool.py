@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Multi-worker Model Pool
+K worker processes, each holding its own model with a fixed number of torch
+threads and optionally pinned to its own CPU cores, fed from one task queue.
+Includes a sweep that finds the best workers x threads split for a machine,
+and a per-worker memory report for spawned vs. preloaded-and-forked workers
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.frame_ring import FrameRing
+
+def available_cores():
+    """CPU ids this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def core_sets(workers, threads, cores=None):
+    """
+    One set of threads cores per worker, consecutive and disjoint while
+    workers x threads fits, wrapping around otherwise.
+    """
+    cores = cores or available_cores()
+    return [sorted({cores[(i * threads + j) % len(cores)] for j in range(threads)}) for i in range(workers)]
+
+def memory_usage(pid):
+    """
+    RSS, PSS and USS (private clean + dirty pages) of a process in MB, from
+    /proc/<pid>/smaps_rollup. USS is what the process alone costs; pages it
+    still shares copy-on-write with its parent only count towards RSS/PSS.
+    """
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1]) / 1024
+    return {"rss_mb": fields.get("Rss", 0.0), "pss_mb": fields.get("Pss", 0.0),
+            "uss_mb": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0)}
+
+def _worker(index, model_path, backend, imgsz, threads, cores, tasks, results, ring=None):
+    # Thread pools are sized when torch is first imported, so the limits go
+    # into the environment before anything pulls torch in
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    try:
+        if cores:
+            os.sched_setaffinity(0, cores)
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+        from src.inference import build_model, warm_up
+        start = time.perf_counter()
+        model = build_model(model_path, backend, imgsz)
+        load_s = time.perf_counter() - start
+        warmup_s = warm_up(model, [(imgsz, imgsz)])
+    except Exception as e:
+        results.put(("failed", index, repr(e)))
+        return
+    results.put(("ready", index, {"names": model.names, "load_s": load_s, "warmup_s": warmup_s, "pid": os.getpid()}))
+    _serve(index, model, tasks, results, ring)
+
+def _forked_worker(index, model, threads, cores, tasks, results, ring=None):
+    # torch is already imported (and its pools sized) in the parent, so only
+    # the runtime thread count can still be set here
+    try:
+        if cores:
+            os.sched_setaffinity(0, cores)
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_grad_enabled(False)
+    except Exception as e:
+        results.put(("failed", index, repr(e)))
+        return
+    results.put(("ready", index, {"names": model.names, "load_s": 0.0, "warmup_s": 0.0, "pid": os.getpid()}))
+    _serve(index, model, tasks, results, ring)
+
+def _serve(index, model, tasks, results, ring):
+    from src.detections import Detections
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, img, kwargs = task
+        # An int is a FrameRing slot: read the frame in place, then free the slot
+        slot = img if isinstance(img, int) else None
+        try:
+            start = time.perf_counter()
+            if slot is not None:
+                img = ring.frame(slot)
+            detections = Detections.from_results(model(img, verbose=False, **kwargs))
+            results.put(("done", task_id, (detections, (time.perf_counter() - start) * 1000, index)))
+        except Exception as e:
+            results.put(("error", task_id, repr(e)))
+        finally:
+            if slot is not None:
+                ring.release(slot)
+
+class ModelPool:
+    """
+    Spread frames over workers worker processes, each loading the model
+    once and running it with threads torch threads. With affinity each
+    worker is pinned to its own threads cores, so workers do not migrate or
+    compete for the same caches. Frames go to whichever worker is free
+    first; submit() returns a Future of the frame's Detections.
+
+    Several small single-threaded predictors usually beat one predictor with
+    many intra-op threads on 640x640 inputs; src/model_pool.py --sweep finds
+    the best split for a machine.
+
+    With a frame_shape, frames of that shape are handed over through a
+    shared-memory FrameRing of ring_slots slots instead of being pickled;
+    other shapes, or frames arriving while every slot is busy, are pickled.
+    """
+    start_method = "spawn"
+
+    def __init__(self, model_path, workers=2, threads=1, affinity=False, backend='pytorch', imgsz=640,
+                 start_timeout=300.0, frame_shape=None, ring_slots=16):
+        if affinity and not hasattr(os, "sched_setaffinity"):
+            raise ValueError("CPU affinity is not supported on this platform")
+        self.model_path = model_path
+        self.workers = workers
+        self.threads = threads
+        self.affinity = affinity
+        self.backend = backend
+        self.imgsz = imgsz
+        self.start_timeout = start_timeout
+        self.cores = core_sets(workers, threads) if affinity else [None] * workers
+        self.names = None
+        self.info = {}
+        self.completed = [0] * workers
+        self._context = mp.get_context(self.start_method)
+        self._tasks = self._context.Queue()
+        self._results = self._context.Queue()
+        self.ring = FrameRing(ring_slots, frame_shape, context=self._context) if frame_shape else None
+        self.ring_frames = 0
+        self._processes = []
+        self._futures = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._dispatcher = None
+        self._closed = False
+
+    def _launch(self):
+        for i in range(self.workers):
+            process = self._context.Process(target=_worker, daemon=True,
+                                            args=(i, self.model_path, self.backend, self.imgsz, self.threads,
+                                                  self.cores[i], self._tasks, self._results, self.ring))
+            process.start()
+            self._processes.append(process)
+
+    def start(self):
+        """Start the workers and wait until every one has its model loaded."""
+        self._launch()
+        deadline = time.perf_counter() + self.start_timeout
+        while len(self.info) < self.workers:
+            try:
+                kind, index, payload = self._results.get(timeout=max(deadline - time.perf_counter(), 0.01))
+            except Exception:
+                self.close()
+                raise TimeoutError(f"Workers not ready after {self.start_timeout:.0f}s")
+            if kind == "failed":
+                self.close()
+                raise RuntimeError(f"Worker {index} failed to load the model: {payload}")
+            self.info[index] = payload
+            self.names = payload["names"]
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+        return self
+
+    def _dispatch(self):
+        while not self._closed:
+            try:
+                kind, task_id, payload = self._results.get(timeout=0.5)
+            except Exception:
+                if not self._closed and not all(p.is_alive() for p in self._processes):
+                    self._fail_pending(RuntimeError("A model pool worker died"))
+                continue
+            with self._lock:
+                future = self._futures.pop(task_id, None)
+            if future is None:
+                continue
+            if kind == "done":
+                detections, _, index = payload
+                self.completed[index] += 1
+                future.set_result(detections)
+            else:
+                future.set_exception(RuntimeError(f"Inference failed in worker: {payload}"))
+
+    def _fail_pending(self, error):
+        with self._lock:
+            futures, self._futures = self._futures, {}
+        for future in futures.values():
+            future.set_exception(error)
+
+    def submit(self, img, **kwargs):
+        """Queue one frame; returns a Future of its Detections."""
+        if self._dispatcher is None or self._closed:
+            raise RuntimeError("ModelPool is not running, call start() first")
+        future = Future()
+        task_id = next(self._ids)
+        with self._lock:
+            self._futures[task_id] = future
+        if self.ring is not None and img.shape == self.ring.shape and img.dtype == self.ring.dtype:
+            written = self.ring.write(img)
+            if written is not None:
+                img = written[0]
+                self.ring_frames += 1
+        self._tasks.put((task_id, img, kwargs))
+        return future
+
+    def map(self, images, **kwargs):
+        """Detections for every frame, in order."""
+        futures = [self.submit(img, **kwargs) for img in images]
+        return [future.result() for future in futures]
+
+    def stats(self):
+        return {"workers": self.workers, "threads": self.threads, "cores": self.cores,
+                "completed": list(self.completed), "pending": len(self._futures), "ring_frames": self.ring_frames}
+
+    def memory(self):
+        """memory_usage() of every worker, in worker order."""
+        return [memory_usage(self.info[i]["pid"]) for i in range(self.workers)]
+
+    def close(self):
+        self._closed = True
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._fail_pending(RuntimeError("ModelPool has been closed"))
+        if self.ring is not None:
+            self.ring.unlink()
+            self.ring = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ForkedModelPool(ModelPool):
+    """
+    ModelPool whose model is loaded and warmed up once in the parent, then
+    shared copy-on-write with forked workers instead of being loaded K times.
+
+    Before forking, the network is switched to eval mode with gradients off
+    and its parameters are moved into shared memory, so no worker ever
+    writes to (and thereby copies) a weight page. The warm-up has already
+    fused layers and built the predictor, so workers do not rebuild either.
+    gc.freeze() keeps the collector from touching every inherited object
+    header. The parent warms up single-threaded, because an OpenMP pool
+    started before fork() can hang the children; workers then set their own
+    thread count. Per-worker USS stays at the activations and buffers of one
+    inference, see --memory.
+
+    Needs the fork start method (Linux), and the parent must not have
+    started other threads that hold locks across the fork.
+    """
+    start_method = "fork"
+
+    def _launch(self):
+        import torch
+        from src.inference import build_model, warm_up
+        threads = torch.get_num_threads()
+        torch.set_num_threads(1)
+        try:
+            start = time.perf_counter()
+            model = build_model(self.model_path, self.backend, self.imgsz)
+            load_s = time.perf_counter() - start
+            warmup_s = warm_up(model, [(self.imgsz, self.imgsz)])
+            network = getattr(getattr(model, "predictor", None), "model", None) or model.model
+            if isinstance(network, torch.nn.Module):
+                network.eval()
+                network.requires_grad_(False)
+                network.share_memory()
+            self.model = model
+            self.load_s, self.warmup_s = load_s, warmup_s
+
+            gc.collect()
+            gc.freeze()
+            try:
+                for i in range(self.workers):
+                    process = self._context.Process(target=_forked_worker, daemon=True,
+                                                    args=(i, model, self.threads, self.cores[i], self._tasks,
+                                                          self._results, self.ring))
+                    process.start()
+                    self._processes.append(process)
+            finally:
+                gc.unfreeze()
+        finally:
+            torch.set_num_threads(threads)
+
+def sweep_configs(cpus, max_workers=None):
+    """(workers, threads) splits with threads a power of two (or all cores) and workers x threads <= cpus."""
+    thread_counts = sorted({2 ** i for i in range(cpus.bit_length()) if 2 ** i <= cpus} | {cpus})
+    return [(workers, threads) for threads in thread_counts
+            for workers in range(1, (max_workers or cpus) + 1) if workers * threads <= cpus]
+
+def measure(model_path, workers, threads, affinity, frames, requests, backend='pytorch', imgsz=640, shm=False,
+            fork=False):
+    """Throughput and latency of one pool configuration over requests frames."""
+    pool_class = ForkedModelPool if fork else ModelPool
+    pool = pool_class(model_path, workers, threads, affinity, backend, imgsz,
+                      frame_shape=frames[0].shape if shm else None).start()
+    try:
+        pool.map(frames[:workers * 2])
+        latencies = []
+        started = time.perf_counter()
+        futures = []
+        for i in range(requests):
+            futures.append((time.perf_counter(), pool.submit(frames[i % len(frames)])))
+        for submitted, future in futures:
+            future.result()
+            latencies.append((time.perf_counter() - submitted) * 1000)
+        elapsed = time.perf_counter() - started
+    finally:
+        pool.close()
+    return {"workers": workers, "threads": threads, "affinity": affinity, "shm": shm, "fork": fork,
+            "fps": requests / elapsed,
+            "p50_ms": float(np.percentile(latencies, 50)), "p95_ms": float(np.percentile(latencies, 95))}
+
+def memory_report(model_path, worker_counts, frames, backend='pytorch', imgsz=640, fork=False):
+    """
+    Per-worker USS and the pool's total PSS after each worker has served
+    frames, for every worker count.
+    """
+    rows = []
+    for workers in worker_counts:
+        pool_class = ForkedModelPool if fork else ModelPool
+        with pool_class(model_path, workers, 1, backend=backend, imgsz=imgsz) as pool:
+            pool.map(frames * workers)
+            usage = pool.memory()
+            parent = memory_usage(os.getpid())
+        rows.append({"fork": fork, "workers": workers,
+                     "uss_mb": float(np.mean([u["uss_mb"] for u in usage])),
+                     "rss_mb": float(np.mean([u["rss_mb"] for u in usage])),
+                     "total_pss_mb": sum(u["pss_mb"] for u in usage) + parent["pss_mb"],
+                     "parent_pss_mb": parent["pss_mb"]})
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a multi-process model pool, or sweep workers x threads")
+    parser.add_argument("--model", type=str, default="app/models/best.pt",
+                        help="Path to model weights (YOLOv8n with random weights when missing)")
+    parser.add_argument("--backend", type=str, default="pytorch", help="Inference backend (pytorch, onnx, openvino)")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes")
+    parser.add_argument("--threads", type=int, default=1, help="torch threads per worker")
+    parser.add_argument("--affinity", action="store_true", help="Pin each worker to its own cores")
+    parser.add_argument("--shm", action="store_true", help="Hand frames over through shared memory, not pickling")
+    parser.add_argument("--fork", action="store_true",
+                        help="Load the model once and fork workers that share it copy-on-write")
+    parser.add_argument("--memory", type=int, nargs="*", default=None, metavar="WORKERS",
+                        help="Report per-worker memory, spawned vs. forked, for these worker counts (default 1 2 4)")
+    parser.add_argument("--sweep", action="store_true", help="Try every workers x threads split that fits the cores")
+    parser.add_argument("--max-workers", type=int, default=None, help="Largest worker count in the sweep")
+    parser.add_argument("--requests", type=int, default=64, help="Frames per measurement")
+    parser.add_argument("--imgsz", type=int, default=640, help="Frame and model input size")
+    parser.add_argument("--output", type=str, default=None, help="Write the measurements as JSON")
+
+    args = parser.parse_args()
+
+    print("🎯 AI CCTV Surveillance - Model Pool")
+    print("=" * 50)
+
+    model_path = args.model
+    if not os.path.exists(model_path):
+        print(f"⚠️ {model_path} not found, using YOLOv8n with random weights")
+        model_path = "yolov8n.yaml"
+    from src.benchmark import synthetic_frame
+    frames = [synthetic_frame((args.imgsz, args.imgsz), seed) for seed in range(8)]
+    cpus = len(available_cores())
+
+    if args.memory is not None:
+        worker_counts = args.memory or [1, 2, 4]
+        try:
+            rows = [row for fork in (False, True)
+                    for row in memory_report(model_path, worker_counts, frames[:2], args.backend, args.imgsz, fork)]
+        except Exception as e:
+            print(f"❌ Error during measurement: {e}")
+            sys.exit(1)
+        print(f"\n{'Workers':<10}{'Mode':<9}{'USS/worker MB':>15}{'RSS/worker MB':>15}{'Total PSS MB':>14}")
+        print("-" * 63)
+        for row in rows:
+            print(f"{row['workers']:<10}{'fork' if row['fork'] else 'spawn':<9}{row['uss_mb']:>15.0f}"
+                  f"{row['rss_mb']:>15.0f}{row['total_pss_mb']:>14.0f}")
+        print("-" * 63)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({"cores": cpus, "results": rows}, f, indent=2)
+            print(f"📁 Results saved to {args.output}")
+        sys.exit(0)
+
+    configs = sweep_configs(cpus, args.max_workers) if args.sweep else [(args.workers, args.threads)]
+    print(f"🖥️ {cpus} cores available, {len(configs)} configuration(s)")
+
+    rows = []
+    try:
+        for workers, threads in configs:
+            print(f"⏱️ {workers} workers x {threads} threads")
+            rows.append(measure(model_path, workers, threads, args.affinity, frames, args.requests,
+                                args.backend, args.imgsz, args.shm, args.fork))
+    except Exception as e:
+        print(f"❌ Error during measurement: {e}")
+        sys.exit(1)
+
+    print(f"\n{'Workers':>8}{'Threads':>9}{'FPS':>9}{'p50 ms':>10}{'p95 ms':>10}")
+    print("-" * 46)
+    for row in rows:
+        print(f"{row['workers']:>8}{row['threads']:>9}{row['fps']:>9.1f}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}")
+    print("-" * 46)
+    best = max(rows, key=lambda row: row["fps"])
+    print(f"🏆 Best: {best['workers']} workers x {best['threads']} threads at {best['fps']:.1f} FPS")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"cores": cpus, "affinity": args.affinity, "shm": args.shm, "fork": args.fork, "results": rows},
+                      f, indent=2)
+        print(f"📁 Results saved to {args.output}")
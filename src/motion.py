@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+
+class MotionGate:
+    """
+    Decide per frame whether the detector needs to run.
+
+    Frames are downscaled to grayscale and compared with the frame the
+    detector last ran on. Inference is skipped while the fraction of changed
+    pixels stays below threshold, but is forced every refresh_interval frames
+    so slow changes and stale detections cannot persist forever.
+    """
+    def __init__(self, threshold=0.01, pixel_delta=25, scale_width=160, refresh_interval=30):
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.scale_width = scale_width
+        self.refresh_interval = refresh_interval
+        self.reference = None
+        self.frames_since_inference = 0
+        self.last_motion = 0.0
+        self.changed = None
+        self.inferred = 0
+        self.gated = 0
+
+    def _downscale(self, img):
+        h, w = img.shape[:2]
+        size = (self.scale_width, max(1, int(h * self.scale_width / w)))
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        small = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def should_infer(self, img):
+        """
+        Return True when the detector should run on img, updating the counters.
+        """
+        small = self._downscale(img)
+        if self.reference is not None and self.reference.shape == small.shape:
+            changed = cv2.absdiff(small, self.reference) > self.pixel_delta
+            self.changed = changed
+            self.last_motion = float(np.count_nonzero(changed)) / changed.size
+            if self.last_motion < self.threshold and self.frames_since_inference < self.refresh_interval:
+                self.frames_since_inference += 1
+                self.gated += 1
+                return False
+        self.reference = small
+        self.frames_since_inference = 0
+        self.inferred += 1
+        return True
+
+    def motion_boxes(self, shape):
+        """
+        Bounding boxes (xyxy, frame coordinates for a frame of the given shape)
+        of the regions that changed in the last compared frame.
+        """
+        if self.changed is None:
+            return np.zeros((0, 4), dtype=np.float32)
+        mask = cv2.dilate(self.changed.astype(np.uint8), np.ones((3, 3), np.uint8))
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        scale = shape[1] / mask.shape[1]
+        boxes = [(x, y, x + w, y + h) for x, y, w, h in map(cv2.boundingRect, contours)]
+        return np.array(boxes, dtype=np.float32).reshape(-1, 4) * scale
+
+    def stats(self):
+        """
+        Counters for gated vs. inferred frames and the share of compute saved.
+        """
+        total = self.inferred + self.gated
+        return {
+            'inferred': self.inferred,
+            'gated': self.gated,
+            'saved': self.gated / total if total else 0.0,
+            'last_motion': self.last_motion,
+        }
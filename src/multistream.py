@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Multi-Camera Stream Runner
+Headless runner that reads many camera streams, batches the latest frame of
+each through the model and reports per-stream FPS and end-to-end latency
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import av
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.adaptive import AdaptiveResolution
+from src.inference import LatestFrameBuffer, build_model, predict_batch, rect_shape
+from src.metrics import METRICS, serve_metrics
+from src.registry import ModelRegistry, RegistryWatcher
+
+class StreamReader(threading.Thread):
+    """
+    Decode one source in a background thread and publish only its newest
+    frame. Network sources (rtsp://, http://) are read live; local files are
+    paced to their frame rate and looped so they behave like a camera.
+    """
+    def __init__(self, stream_id, source, loop=True):
+        super().__init__(daemon=True)
+        self.stream_id = stream_id
+        self.source = source
+        self.live = "://" in source
+        self.loop = loop and not self.live
+        self.buffer = LatestFrameBuffer()
+        self.captured = 0
+        self.error = None
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        options = {"rtsp_transport": "tcp"} if self.source.startswith("rtsp://") else {}
+        try:
+            while not self._stopped.is_set():
+                with av.open(self.source, options=options) as container:
+                    stream = container.streams.video[0]
+                    stream.thread_type = "AUTO"
+                    started = time.perf_counter()
+                    for frame in container.decode(stream):
+                        if self._stopped.is_set():
+                            return
+                        if not self.live and frame.time is not None:
+                            # Real-time pacing for files
+                            delay = started + float(frame.time) - time.perf_counter()
+                            if delay > 0:
+                                time.sleep(delay)
+                        decode_start = time.perf_counter()
+                        img = frame.to_ndarray(format="bgr24")
+                        METRICS.observe("multistream", "decode", (time.perf_counter() - decode_start) * 1000)
+                        self.buffer.put((img, time.perf_counter()))
+                        self.captured += 1
+                if not self.loop:
+                    return
+        except Exception as e:
+            self.error = e
+            print(f"[ERROR] Stream {self.stream_id} ({self.source}): {e}")
+
+class StreamStats:
+    """
+    Rolling per-stream throughput and capture-to-result latency.
+    """
+    def __init__(self, window=300):
+        self.results = 0
+        self.latencies = deque(maxlen=window)
+        self.times = deque(maxlen=window)
+
+    def record(self, latency_s):
+        self.results += 1
+        self.latencies.append(latency_s * 1000)
+        self.times.append(time.perf_counter())
+
+    def fps(self):
+        if len(self.times) < 2:
+            return 0.0
+        return (len(self.times) - 1) / max(self.times[-1] - self.times[0], 1e-9)
+
+    def latency(self):
+        if not self.latencies:
+            return 0.0, 0.0
+        values = np.array(self.latencies)
+        return float(np.median(values)), float(np.percentile(values, 95))
+
+class MultiStreamRunner:
+    """
+    Collect the newest frame of every stream, run them through the model as
+    one batch and route each result back to its stream via on_result.
+
+    With a latency budget every stream gets its own AdaptiveResolution
+    controller; with rect every stream uses a fixed rectangular input matched
+    to its aspect ratio. Streams with the same input shape share a batch.
+    """
+    def __init__(self, model, sources, imgsz=640, on_result=None, loop=True, budget_ms=None,
+                 sizes=(320, 480, 640), rect=False):
+        self.model = model
+        self.imgsz = imgsz
+        self.rect = rect
+        self.input_shapes = {}
+        self.on_result = on_result
+        self.readers = [StreamReader(i, source, loop=loop) for i, source in enumerate(sources)]
+        self.stats = [StreamStats() for _ in sources]
+        self.controllers = None
+        if budget_ms is not None:
+            self.controllers = [AdaptiveResolution(sizes=sizes, budget_ms=budget_ms) for _ in sources]
+        self.batches = 0
+
+    def step(self, wait=0.005):
+        """
+        Run one batch over every stream that has a new frame. Returns the
+        number of frames processed.
+        """
+        pending = []
+        for reader in self.readers:
+            item = reader.buffer.get(timeout=0)
+            if item is not None:
+                pending.append((reader.stream_id, item[0], item[1]))
+        if not pending:
+            time.sleep(wait)
+            return 0
+
+        groups = {}
+        for stream_id, img, captured_at in pending:
+            size = self.imgsz if self.controllers is None else self.controllers[stream_id].imgsz
+            if self.rect:
+                key = (stream_id, size)
+                if key not in self.input_shapes:
+                    self.input_shapes[key] = rect_shape(img.shape, size)
+                size = self.input_shapes[key]
+            groups.setdefault(size, []).append((stream_id, img, captured_at))
+
+        # Read once so a model hot-swapped mid-step does not split a batch
+        model = self.model
+        for size, group in groups.items():
+            started = time.perf_counter()
+            results = list(predict_batch(model, [img for _, img, _ in group],
+                                         batch_size=len(group), imgsz=size, draw=False,
+                                         path="multistream"))
+            batch_ms = (time.perf_counter() - started) * 1000
+            for (stream_id, _, captured_at), result in zip(group, results):
+                self.stats[stream_id].record(time.perf_counter() - captured_at)
+                if self.controllers is not None:
+                    self.controllers[stream_id].record(batch_ms)
+                if self.on_result is not None:
+                    self.on_result(stream_id, result)
+            self.batches += 1
+        return len(pending)
+
+    def run(self, duration=None, report_every=5.0):
+        """
+        Start all readers and process batches until duration seconds passed
+        (or forever), printing a report every report_every seconds.
+        """
+        for reader in self.readers:
+            reader.start()
+        started = last_report = time.perf_counter()
+        try:
+            while duration is None or time.perf_counter() - started < duration:
+                self.step()
+                if time.perf_counter() - last_report >= report_every:
+                    self.report()
+                    last_report = time.perf_counter()
+                if not any(reader.is_alive() for reader in self.readers):
+                    break
+        except KeyboardInterrupt:
+            print("\n🛑 Stopped by user")
+        finally:
+            for reader in self.readers:
+                reader.stop()
+        return time.perf_counter() - started
+
+    def report(self):
+        print(f"{'Stream':<8}{'Captured':>10}{'Dropped':>10}{'FPS':>8}{'p50 ms':>10}{'p95 ms':>10}{'imgsz':>8}")
+        for reader, stats in zip(self.readers, self.stats):
+            p50, p95 = stats.latency()
+            size = self.imgsz if self.controllers is None else self.controllers[reader.stream_id].imgsz
+            print(f"{reader.stream_id:<8}{reader.captured:>10}{reader.buffer.dropped:>10}"
+                  f"{stats.fps():>8.1f}{p50:>10.1f}{p95:>10.1f}{size:>8}")
+        print("-" * 64)
+
+    def summary(self, elapsed, target_fps):
+        """
+        Aggregate throughput and how many cameras per core it can sustain at
+        target_fps.
+        """
+        total = sum(stats.results for stats in self.stats)
+        throughput = total / max(elapsed, 1e-9)
+        cores = os.cpu_count() or 1
+        return {
+            "streams": len(self.readers),
+            "frames": total,
+            "batches": self.batches,
+            "throughput_fps": throughput,
+            "mean_batch": total / max(self.batches, 1),
+            "cores": cores,
+            "cameras_per_core": throughput / target_fps / cores,
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run PPE detection over many camera streams")
+    parser.add_argument("sources", nargs="+", help="RTSP URLs or local video files (files are looped in real time)")
+    parser.add_argument("--model", type=str, default="app/models/best.pt", help="Path to model weights")
+    parser.add_argument("--registry", type=str, default=None,
+                        help="Serve the registry's active model and hot-swap when it changes (overrides --model)")
+    parser.add_argument("--backend", type=str, default="pytorch", help="Inference backend (pytorch, onnx, openvino)")
+    parser.add_argument("--imgsz", type=int, default=640, help="Image size")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to run (0 runs until interrupted)")
+    parser.add_argument("--report-every", type=float, default=5, help="Seconds between reports")
+    parser.add_argument("--target-fps", type=float, default=10, help="Per-camera FPS used for capacity sizing")
+    parser.add_argument("--no-loop", action="store_true", help="Stop file sources at end of file")
+    parser.add_argument("--latency-budget", type=float, default=None,
+                        help="Per-frame inference budget in ms; streams drop to smaller input sizes to meet it")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[320, 480, 640], help="Input sizes for --latency-budget")
+    parser.add_argument("--rect", action="store_true", help="Rectangular input matched to each camera's aspect ratio")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Serve per-stage latency histograms at http://127.0.0.1:PORT/metrics")
+
+    args = parser.parse_args()
+
+    print("🎯 AI CCTV Surveillance - Multi-Camera Runner")
+    print("=" * 50)
+
+    watcher = None
+    try:
+        if args.registry:
+            watcher = RegistryWatcher(ModelRegistry(args.registry), backend=args.backend, imgsz=args.imgsz)
+            watcher.start()
+            model = watcher.wait()
+            if model is None:
+                raise watcher.error
+        else:
+            model = build_model(args.model, backend=args.backend, imgsz=args.imgsz)
+    except Exception as e:
+        print(f"❌ Error loading model: {e}")
+        sys.exit(1)
+
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+        print(f"📈 Metrics at http://127.0.0.1:{args.metrics_port}/metrics")
+
+    runner = MultiStreamRunner(model, args.sources, imgsz=args.imgsz, loop=not args.no_loop,
+                               budget_ms=args.latency_budget, sizes=args.sizes, rect=args.rect)
+    if watcher is not None:
+        watcher.on_swap.append(lambda version, new_model: setattr(runner, "model", new_model))
+        # In case a swap landed before the callback was registered
+        runner.model = watcher.model
+    elapsed = runner.run(duration=args.duration or None, report_every=args.report_every)
+    runner.report()
+    summary = runner.summary(elapsed, args.target_fps)
+    print(f"📊 {summary['frames']} frames from {summary['streams']} streams in {elapsed:.1f}s")
+    print(f"   Throughput: {summary['throughput_fps']:.1f} FPS, mean batch {summary['mean_batch']:.1f}")
+    print(f"   Capacity: {summary['cameras_per_core']:.2f} cameras/core at {args.target_fps:g} FPS "
+          f"({summary['cores']} cores)")
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Offline Video Processing
+Decode a recorded video frame by frame, run batched PPE detection and write an
+annotated video plus a JSONL stream of detections
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from fractions import Fraction
+
+import av
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.detections import Detections
+from src.inference import build_model, predict_batch, predict_tiled, draw_detections
+from src.motion import MotionGate
+from src.render import Renderer
+from src.tiling import focus_person_boxes
+
+def _seek_before(container, stream, start, origin, margin=2.0):
+    """
+    Position the decoder at or before start seconds into the video and
+    return an iterator of decoded frames. Containers such as MPEG-TS can land
+    past the requested point, so the first frame is checked and the seek
+    backed off further, down to the start of the video.
+    """
+    while True:
+        target = max(start - margin, 0.0)
+        # Seeking to the first frame's own timestamp can overshoot too, so the
+        # last resort rewinds to position 0
+        container.seek(int((origin + target) / stream.time_base) if target > 0 else 0, stream=stream)
+        frames = container.decode(stream)
+        first = next(frames, None)
+        if first is None or first.time is None or round(first.time - origin, 6) <= start or target == 0.0:
+            return frames if first is None else itertools.chain([first], frames)
+        margin *= 2
+
+def iter_frames(video_path: str, start: float = None, end: float = None, stride: int = 1):
+    """
+    Yield (frame_index, timestamp, bgr_array) from a video without ever
+    holding more than one decoded frame. frame_index counts from the start
+    of the video and timestamp is seconds since its first frame, the clock
+    start and end are given in. Both hold when decoding begins at start, so
+    records point back to the source footage.
+    """
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        origin = float(stream.start_time * stream.time_base) if stream.start_time is not None else 0.0
+        fps = float(stream.average_rate or stream.guessed_rate or 0)
+        frames = _seek_before(container, stream, start, origin) if start else container.decode(stream)
+        # After a seek the first frame's position is derived from its
+        # timestamp; from there frames are counted
+        index = None if start else 0
+        decoded = 0
+        for frame in frames:
+            # Rounded so subtracting the origin does not push a frame past end
+            timestamp = round(float(frame.time) - origin, 6) if frame.time is not None else 0.0
+            if start and timestamp < start:
+                continue
+            if end is not None and timestamp > end:
+                break
+            if index is None:
+                index = round(timestamp * fps)
+            if decoded % stride == 0:
+                yield index, timestamp, frame.to_ndarray(format="bgr24")
+            index += 1
+            decoded += 1
+
+def batched(iterable, size: int):
+    """Group an iterable into lists of at most `size` items."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def detection_record(index, timestamp, inferred, detections, names):
+    """One JSONL line describing the detections of a frame."""
+    return {
+        "frame": index,
+        "time": round(timestamp, 3),
+        "inferred": inferred,
+        "detections": detections.to_dict(names),
+    }
+
+def process_video(
+    model,
+    video_path: str,
+    output_path: str,
+    jsonl_path: str,
+    start: float = None,
+    end: float = None,
+    stride: int = 1,
+    batch_size: int = 8,
+    imgsz: int = 640,
+    motion_threshold: float = None,
+    tile_size: int = None,
+    tile_overlap: float = 0.2,
+    tile_focus: str = None,
+    rect: bool = True
+):
+    """
+    Stream a video through the model and write the annotated video and JSONL
+    detections. With tile_size each frame is run as a batch of tiles instead
+    of batching whole frames; tile_focus 'persons' runs only the tiles around
+    the previous frame's persons, 'motion' only those where the motion gate
+    saw change (plus the downscaled whole-frame pass). With rect frames are letterboxed to the
+    smallest stride-aligned rectangle for the video's aspect ratio instead of
+    a square. Returns the number of frames processed.
+    """
+    with av.open(video_path) as probe:
+        source = probe.streams.video[0]
+        fps = Fraction(source.average_rate or 25) / stride
+        width, height = source.codec_context.width, source.codec_context.height
+
+    if tile_focus not in (None, "persons", "motion"):
+        raise ValueError(f"Unknown tile_focus '{tile_focus}', expected 'persons' or 'motion'")
+    if tile_focus == "motion" and motion_threshold is None:
+        raise ValueError("tile_focus 'motion' needs a motion_threshold for the motion gate")
+    names = model.names if hasattr(model, 'names') else None
+    gate = MotionGate(threshold=motion_threshold) if motion_threshold is not None else None
+    last = Detections.empty()
+    processed = 0
+    started = time.perf_counter()
+
+    with av.open(output_path, mode="w") as output, open(jsonl_path, "w") as jsonl:
+        out_stream = output.add_stream("libx264", rate=fps)
+        out_stream.width, out_stream.height = width, height
+        out_stream.pix_fmt = "yuv420p"
+
+        # Frames skipped by the motion gate repeat the last detections
+        renderer = Renderer(reuse=True)
+        for batch in batched(iter_frames(video_path, start, end, stride), batch_size):
+            # Only frames that pass the motion gate go through the model
+            infer, motion = [], []
+            for _, _, img in batch:
+                infer.append(gate is None or gate.should_infer(img))
+                motion.append(gate.motion_boxes(img.shape) if tile_focus == "motion" else None)
+            frames = [img for (_, _, img), run in zip(batch, infer) if run]
+            if tile_size:
+                focus = [boxes for boxes, run in zip(motion, infer) if run]
+                # Lazy, so the persons focus sees the detections of the frame before
+                results = (predict_tiled(model, img, tile_size=tile_size, overlap=tile_overlap,
+                                         focus_boxes=focus_person_boxes(last, names or []) if tile_focus == "persons"
+                                         else boxes)
+                           for img, boxes in zip(frames, focus))
+            else:
+                results = iter(predict_batch(model, frames, batch_size=batch_size, imgsz=imgsz, rect=rect,
+                                             path="video"))
+            for (index, timestamp, img), run in zip(batch, infer):
+                if run:
+                    result = next(results)
+                    last = result.detections
+                else:
+                    draw_detections(img, last, names, renderer=renderer)
+                jsonl.write(json.dumps(detection_record(index, timestamp, run, last, names)) + "\n")
+                for packet in out_stream.encode(av.VideoFrame.from_ndarray(img, format="bgr24")):
+                    output.mux(packet)
+                processed += 1
+
+            elapsed = time.perf_counter() - started
+            print(f"⏱️ {processed} frames, {processed / elapsed:.1f} FPS", end="\r")
+
+        for packet in out_stream.encode():
+            output.mux(packet)
+
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ Processed {processed} frames in {elapsed:.1f}s ({processed / max(elapsed, 1e-9):.1f} FPS)")
+    if gate is not None:
+        stats = gate.stats()
+        print(f"🎞️ Motion gate: {stats['inferred']} inferred, {stats['gated']} skipped ({stats['saved']:.0%} saved)")
+    return processed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run PPE detection over a recorded video file")
+    parser.add_argument("video", type=str, help="Input video file")
+    parser.add_argument("--model", type=str, default="app/models/best.pt", help="Path to model weights")
+    parser.add_argument("--backend", type=str, default="pytorch", help="Inference backend (pytorch, onnx, openvino)")
+    parser.add_argument("--output", type=str, default=None, help="Annotated output video (default: <video>_annotated.mp4)")
+    parser.add_argument("--jsonl", type=str, default=None, help="Detections output (default: <video>_detections.jsonl)")
+    parser.add_argument("--start", type=float, default=None, help="Start timestamp in seconds")
+    parser.add_argument("--end", type=float, default=None, help="End timestamp in seconds")
+    parser.add_argument("--stride", type=int, default=1, help="Process every Nth frame")
+    parser.add_argument("--batch", type=int, default=8, help="Frames per forward pass")
+    parser.add_argument("--imgsz", type=int, default=640, help="Image size")
+    parser.add_argument("--motion-threshold", type=float, default=None,
+                        help="Skip inference on frames whose changed-pixel fraction is below this")
+    parser.add_argument("--tile-size", type=int, default=None, help="Tiled inference for high-resolution video")
+    parser.add_argument("--tile-overlap", type=float, default=0.2, help="Overlap between neighbouring tiles")
+    parser.add_argument("--tile-focus", type=str, default=None, choices=["persons", "motion"],
+                        help="Only run tiles around the last persons seen, or where motion was seen "
+                             "(needs --motion-threshold)")
+    parser.add_argument("--square", action="store_true", help="Letterbox to a square imgsz instead of the video's aspect ratio")
+
+    args = parser.parse_args()
+
+    print("🎯 AI CCTV Surveillance - Video Processing")
+    print("=" * 50)
+
+    if not os.path.exists(args.video):
+        print(f"❌ Error: Video file '{args.video}' not found!")
+        sys.exit(1)
+
+    base, _ = os.path.splitext(args.video)
+    try:
+        model = build_model(args.model, backend=args.backend, imgsz=args.imgsz)
+        process_video(
+            model,
+            args.video,
+            output_path=args.output or f"{base}_annotated.mp4",
+            jsonl_path=args.jsonl or f"{base}_detections.jsonl",
+            start=args.start,
+            end=args.end,
+            stride=args.stride,
+            batch_size=args.batch,
+            imgsz=args.imgsz,
+            motion_threshold=args.motion_threshold,
+            tile_size=args.tile_size,
+            tile_overlap=args.tile_overlap,
+            tile_focus=args.tile_focus,
+            rect=not args.square
+        )
+    except Exception as e:
+        print(f"❌ Error processing video: {e}")
+        sys.exit(1)
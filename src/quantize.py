@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+INT8 Post-Training Quantization
+Calibrate an INT8 OpenVINO model from best.pt on the validation split and
+compare it with the FP32 model for accuracy and CPU latency
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+from ultralytics import YOLO
+from ultralytics.data.utils import check_det_dataset
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.inference import build_model
+
+def export_int8(weights: str, data_yaml_path: str, imgsz: int = 640, fraction: float = 0.25):
+    """Export an INT8 OpenVINO model calibrated on a fraction of the val split."""
+    print(f"⚙️ Calibrating INT8 model on {fraction:.0%} of the validation split...")
+    exported = YOLO(weights).export(format="openvino", int8=True, data=data_yaml_path,
+                                    fraction=fraction, imgsz=imgsz, dynamic=True)
+    print(f"✅ INT8 model written to {exported}")
+    return exported
+
+def evaluate(model, data_yaml_path: str, imgsz: int = 640):
+    """Run validation and return overall and per-class metrics."""
+    metrics = model.val(data=data_yaml_path, imgsz=imgsz, batch=1, split="val", plots=False, verbose=False)
+    per_class = {}
+    for i, cls in enumerate(metrics.box.ap_class_index):
+        _, _, ap50, ap = metrics.box.class_result(i)
+        per_class[metrics.names[int(cls)]] = {"ap50": float(ap50), "ap50_95": float(ap)}
+    return {
+        "map50": float(metrics.box.map50),
+        "map50_95": float(metrics.box.map),
+        "per_class": per_class,
+    }
+
+def measure_latency(model, image_paths, imgsz: int = 640, warmup: int = 3):
+    """Per-image predict latency in ms (mean, median, p95) on the given images."""
+    for path in image_paths[:warmup]:
+        model(path, imgsz=imgsz, verbose=False)
+    times = []
+    for path in image_paths:
+        start = time.perf_counter()
+        model(path, imgsz=imgsz, verbose=False)
+        times.append((time.perf_counter() - start) * 1000)
+    times = np.array(times)
+    return {
+        "mean_ms": float(times.mean()),
+        "median_ms": float(np.median(times)),
+        "p95_ms": float(np.percentile(times, 95)),
+    }
+
+def validation_images(data_yaml_path: str, limit: int):
+    """First `limit` images of the validation split."""
+    val = check_det_dataset(data_yaml_path)["val"]
+    val_dirs = val if isinstance(val, list) else [val]
+    images = []
+    for val_dir in val_dirs:
+        images += sorted(os.path.join(val_dir, f) for f in os.listdir(val_dir)
+                         if f.lower().endswith((".jpg", ".jpeg", ".png")))
+    return images[:limit]
+
+def print_report(report):
+    """Print the FP32 vs. INT8 comparison table."""
+    fp32, int8 = report["fp32"], report["int8"]
+    print("\n📊 FP32 vs. INT8")
+    print("-" * 62)
+    print(f"{'Metric':<22}{'FP32':>12}{'INT8':>12}{'Delta':>14}")
+    print("-" * 62)
+    for key, label in [("map50", "mAP50"), ("map50_95", "mAP50-95")]:
+        print(f"{label:<22}{fp32[key]:>12.4f}{int8[key]:>12.4f}{int8[key] - fp32[key]:>+14.4f}")
+    for key, label in [("mean_ms", "Latency mean (ms)"), ("median_ms", "Latency median (ms)"), ("p95_ms", "Latency p95 (ms)")]:
+        a, b = fp32["latency"][key], int8["latency"][key]
+        print(f"{label:<22}{a:>12.1f}{b:>12.1f}{b - a:>+14.1f}")
+    print("-" * 62)
+    print(f"{'Class':<22}{'FP32 AP50':>12}{'INT8 AP50':>12}{'Delta':>14}")
+    print("-" * 62)
+    for name, fp32_ap in fp32["per_class"].items():
+        int8_ap = int8["per_class"].get(name, {"ap50": 0.0})
+        print(f"{name:<22}{fp32_ap['ap50']:>12.4f}{int8_ap['ap50']:>12.4f}{int8_ap['ap50'] - fp32_ap['ap50']:>+14.4f}")
+    print("-" * 62)
+    print(f"🚀 Speed-up: {fp32['latency']['mean_ms'] / int8['latency']['mean_ms']:.2f}x")
+
+def quantize(
+    weights: str,
+    data_yaml_path: str,
+    imgsz: int = 640,
+    fraction: float = 0.25,
+    fp32_backend: str = "openvino",
+    latency_images: int = 100,
+    install_dir: str = None
+):
+    """
+    Quantize, evaluate both models on the same split and write a JSON report.
+    """
+    try:
+        int8_path = export_int8(weights, data_yaml_path, imgsz, fraction)
+        models = {
+            "fp32": build_model(weights, backend=fp32_backend, imgsz=imgsz),
+            "int8": YOLO(int8_path, task="detect"),
+        }
+        images = validation_images(data_yaml_path, latency_images)
+
+        report = {"weights": weights, "int8_model": int8_path, "fp32_backend": fp32_backend, "imgsz": imgsz}
+        for precision, model in models.items():
+            print(f"🔍 Evaluating {precision.upper()} model...")
+            report[precision] = evaluate(model, data_yaml_path, imgsz)
+            report[precision]["latency"] = measure_latency(model, images, imgsz)
+
+        print_report(report)
+        report_path = os.path.join(int8_path, "quantization_report.json")
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📁 Report saved to {report_path}")
+
+        if install_dir:
+            destination = os.path.join(install_dir, os.path.basename(os.path.normpath(int8_path)))
+            shutil.copytree(int8_path, destination, dirs_exist_ok=True)
+            print(f"✅ INT8 model installed to {destination}")
+        return report
+
+    except Exception as e:
+        print(f"❌ Error during quantization: {e}")
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="INT8 post-training quantization for the PPE detector")
+    parser.add_argument("--weights", type=str, default=None, help="Path to best.pt (e.g. runs/detect/train/weights/best.pt)")
+    parser.add_argument("--registry-version", type=str, default=None,
+                        help="Quantize this model registry version in place instead of --weights, so the "
+                             "registry can serve it with the openvino-int8 backend")
+    parser.add_argument("--registry", type=str, default=None, help="Model registry directory (default app/models/registry)")
+    parser.add_argument("--data", type=str, required=True, help="Path to data.yaml file")
+    parser.add_argument("--imgsz", type=int, default=640, help="Image size")
+    parser.add_argument("--fraction", type=float, default=0.25, help="Fraction of valid/images used for calibration")
+    parser.add_argument("--fp32-backend", type=str, default="openvino", choices=["pytorch", "onnx", "openvino"],
+                        help="Backend for the FP32 reference model")
+    parser.add_argument("--latency-images", type=int, default=100, help="Validation images used to time inference")
+    parser.add_argument("--install", action="store_true", help="Copy the INT8 model to app/models/")
+
+    args = parser.parse_args()
+
+    print("🎯 AI CCTV Surveillance - INT8 Quantization")
+    print("=" * 50)
+
+    if args.registry_version:
+        from src.registry import DEFAULT_REGISTRY, ModelRegistry
+        registry = ModelRegistry(args.registry or DEFAULT_REGISTRY)
+        try:
+            args.weights = registry.model_path(args.registry_version)
+        except FileNotFoundError:
+            print(f"❌ Error: Version '{args.registry_version}' not found in {registry.root}")
+            sys.exit(1)
+    if args.weights is None:
+        print("❌ Error: Pass --weights or --registry-version")
+        sys.exit(1)
+    if not os.path.exists(args.weights):
+        print(f"❌ Error: Model file '{args.weights}' not found!")
+        sys.exit(1)
+
+    report = quantize(
+        weights=args.weights,
+        data_yaml_path=args.data,
+        imgsz=args.imgsz,
+        fraction=args.fraction,
+        fp32_backend=args.fp32_backend,
+        latency_images=args.latency_images,
+        install_dir="app/models" if args.install else None
+    )
+
+    if report is None:
+        print("\n❌ Quantization failed!")
+        sys.exit(1)
+    print("\n🎉 Quantization completed!")
+    print("💡 Select the 'openvino-int8' backend in the app to serve the INT8 model")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Square vs. Rectangular Letterbox Benchmark
+Compare inference latency on 16:9 camera frames and mAP on the validation
+split between square and stride-aligned rectangular model inputs
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.inference import build_model, predict_batch, rect_shape
+from src.process_video import iter_frames
+
+def camera_frames(video_path: str = None, count: int = 50, width: int = 1920, height: int = 1080):
+    """Frames from a recorded video, or synthetic frames of the given size."""
+    if video_path:
+        return [frame for _, _, frame in itertools.islice(iter_frames(video_path), count)]
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+def measure_latency(model, frames, imgsz: int = 640, batch_size: int = 1, rect: bool = False, warmup: int = 3):
+    """Per-frame latency in ms (mean, median, p95) through predict_batch."""
+    for _ in predict_batch(model, frames[:warmup], batch_size=batch_size, imgsz=imgsz, draw=False, rect=rect):
+        pass
+    times = []
+    for start in range(0, len(frames), batch_size):
+        batch = frames[start:start + batch_size]
+        started = time.perf_counter()
+        for _ in predict_batch(model, batch, batch_size=batch_size, imgsz=imgsz, draw=False, rect=rect):
+            pass
+        times.append((time.perf_counter() - started) * 1000 / len(batch))
+    times = np.array(times)
+    return {
+        "mean_ms": float(times.mean()),
+        "median_ms": float(np.median(times)),
+        "p95_ms": float(np.percentile(times, 95)),
+    }
+
+def evaluate(model, data_yaml_path: str, imgsz: int = 640, rect: bool = False):
+    """mAP on the validation split with square or rectangular batches."""
+    metrics = model.val(data=data_yaml_path, imgsz=imgsz, batch=1, rect=rect, split="val",
+                        plots=False, verbose=False)
+    return {"map50": float(metrics.box.map50), "map50_95": float(metrics.box.map)}
+
+def benchmark(model, frames, data_yaml_path: str = None, imgsz: int = 640, batch_size: int = 1):
+    """Run both modes and return the comparison report."""
+    h, w = frames[0].shape[:2]
+    report = {"frame_shape": [h, w], "imgsz": imgsz, "batch": batch_size,
+              "square": {"input_shape": [imgsz, imgsz]},
+              "rect": {"input_shape": list(rect_shape(frames[0].shape, imgsz))}}
+    for mode in ("square", "rect"):
+        print(f"⏱️ Timing {mode} inputs {report[mode]['input_shape']}...")
+        report[mode]["latency"] = measure_latency(model, frames, imgsz, batch_size, rect=mode == "rect")
+        if data_yaml_path:
+            print(f"🔍 Evaluating {mode} inputs on the validation split...")
+            report[mode].update(evaluate(model, data_yaml_path, imgsz, rect=mode == "rect"))
+    return report
+
+def print_report(report):
+    """Print the square vs. rectangular comparison table."""
+    square, rect = report["square"], report["rect"]
+    print(f"\n📊 Square vs. rectangular ({report['frame_shape'][1]}x{report['frame_shape'][0]} frames)")
+    print("-" * 62)
+    print(f"{'Metric':<22}{'Square':>12}{'Rect':>12}{'Delta':>14}")
+    print("-" * 62)
+    print(f"{'Input (h x w)':<22}{'x'.join(map(str, square['input_shape'])):>12}"
+          f"{'x'.join(map(str, rect['input_shape'])):>12}")
+    for key, label in [("mean_ms", "Latency mean (ms)"), ("median_ms", "Latency median (ms)"), ("p95_ms", "Latency p95 (ms)")]:
+        a, b = square["latency"][key], rect["latency"][key]
+        print(f"{label:<22}{a:>12.1f}{b:>12.1f}{b - a:>+14.1f}")
+    for key, label in [("map50", "mAP50"), ("map50_95", "mAP50-95")]:
+        if key in square:
+            print(f"{label:<22}{square[key]:>12.4f}{rect[key]:>12.4f}{rect[key] - square[key]:>+14.4f}")
+    print("-" * 62)
+    print(f"🚀 Speed-up: {square['latency']['mean_ms'] / rect['latency']['mean_ms']:.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark square vs. rectangular letterbox inference")
+    parser.add_argument("--model", type=str, default="app/models/best.pt", help="Path to model weights")
+    parser.add_argument("--backend", type=str, default="pytorch", help="Inference backend (pytorch, onnx, openvino)")
+    parser.add_argument("--data", type=str, default=None, help="data.yaml for mAP on the validation split")
+    parser.add_argument("--video", type=str, default=None, help="Time on frames of this video instead of synthetic 1920x1080 frames")
+    parser.add_argument("--frames", type=int, default=50, help="Frames to time")
+    parser.add_argument("--imgsz", type=int, default=640, help="Image size (long side)")
+    parser.add_argument("--batch", type=int, default=1, help="Frames per forward pass")
+    parser.add_argument("--output", type=str, default=None, help="Write the report as JSON")
+
+    args = parser.parse_args()
+
+    print("🎯 AI CCTV Surveillance - Rectangular Inference Benchmark")
+    print("=" * 50)
+
+    try:
+        model = build_model(args.model, backend=args.backend, imgsz=args.imgsz)
+        report = benchmark(model, camera_frames(args.video, args.frames), args.data, args.imgsz, args.batch)
+    except Exception as e:
+        print(f"❌ Error during benchmark: {e}")
+        sys.exit(1)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📁 Report saved to {args.output}")
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Model Registry
+Versioned, checksummed model weights with an "active" pointer that running
+apps and stream workers watch and hot-swap to without restarting
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# registry/<version>/best.pt + manifest.json, registry/ACTIVE names the served
+# version and registry/history.json lists activations for rollback
+DEFAULT_REGISTRY = "app/models/registry"
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Hex SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def write_atomic(path, text):
+    """Write text to path so readers see either the old or the new content."""
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class ModelRegistry:
+    """
+    A directory of model versions. Registering copies the weights in under a
+    new version with their checksum; activating or rolling back only rewrites
+    the ACTIVE pointer, so it is instant and atomic.
+    """
+    def __init__(self, root=DEFAULT_REGISTRY):
+        self.root = root
+
+    def _path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def manifest(self, version):
+        with open(self._path(version, "manifest.json"), "r") as f:
+            return json.load(f)
+
+    def versions(self):
+        """Manifests of all registered versions, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        manifests = [self.manifest(name) for name in os.listdir(self.root)
+                     if os.path.exists(self._path(name, "manifest.json"))]
+        return sorted(manifests, key=lambda m: m["created"])
+
+    def model_path(self, version):
+        return self._path(version, self.manifest(version)["file"])
+
+    def active(self):
+        """The active version, or None when nothing has been activated."""
+        try:
+            with open(self._path("ACTIVE"), "r") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def history(self):
+        try:
+            with open(self._path("history.json"), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def find(self, sha256):
+        """Version already holding weights with this checksum, if any."""
+        for manifest in self.versions():
+            if manifest["sha256"] == sha256:
+                return manifest["version"]
+        return None
+
+    def register(self, weights, version=None, activate=True, note=""):
+        """
+        Copy weights into the registry as a new version and (by default)
+        activate it. Weights that are already registered are not copied
+        again. Returns the version.
+        """
+        sha256 = file_sha256(weights)
+        existing = self.find(sha256)
+        if existing is None:
+            version = version or f"v{len(self.versions()) + 1:03d}"
+            if os.path.exists(self._path(version)):
+                raise FileExistsError(f"Version {version} already exists in {self.root}")
+            # Copy into a staging directory and rename, so watchers never see a half-written version
+            staging = self._path(f".staging-{version}")
+            os.makedirs(staging, exist_ok=True)
+            filename = os.path.basename(weights)
+            shutil.copy2(weights, os.path.join(staging, filename))
+            manifest = {"version": version, "file": filename, "sha256": sha256, "source": os.path.abspath(weights),
+                        "created": time.time(), "note": note}
+            write_atomic(os.path.join(staging, "manifest.json"), json.dumps(manifest, indent=2))
+            os.replace(staging, self._path(version))
+        else:
+            version = existing
+        if activate:
+            self.activate(version)
+        return version
+
+    def verify(self, version):
+        """True if the stored weights still match their recorded checksum."""
+        return file_sha256(self.model_path(version)) == self.manifest(version)["sha256"]
+
+    def activate(self, version):
+        """Point ACTIVE at version after checking its checksum."""
+        if not self.verify(version):
+            raise ValueError(f"Checksum mismatch for model version {version}")
+        if version == self.active():
+            return version
+        write_atomic(self._path("history.json"), json.dumps(self.history() + [version]))
+        write_atomic(self._path("ACTIVE"), version + "\n")
+        return version
+
+    def rollback(self):
+        """Re-activate the version that was active before the current one."""
+        history, active = self.history(), self.active()
+        while history and history[-1] == active:
+            history.pop()
+        if not history:
+            raise ValueError("No earlier version to roll back to")
+        version = history[-1]
+        if not self.verify(version):
+            raise ValueError(f"Checksum mismatch for model version {version}")
+        write_atomic(self._path("history.json"), json.dumps(history))
+        write_atomic(self._path("ACTIVE"), version + "\n")
+        return version
+
+class RegistryWatcher(threading.Thread):
+    """
+    Serve the registry's active model and follow the ACTIVE pointer. A new
+    version is loaded and warmed up in this thread while the current model
+    keeps serving; only then is it swapped in with a single assignment, so
+    callers reading .model never wait and never drop a frame. Has the same
+    state/ready/wait interface as ModelLoader.
+    """
+    def __init__(self, registry, backend='pytorch', imgsz=640, interval=2.0, shapes=None, runs=2):
+        # The inference stack (cv2, streamlit, ultralytics) is only needed by
+        # the watcher, not by scripts that just register or compare versions
+        from src.inference import rect_shape
+        super().__init__(daemon=True)
+        self.registry = registry
+        self.backend = backend
+        self.imgsz = imgsz
+        self.interval = interval
+        self.shapes = shapes or [(imgsz, imgsz), rect_shape((720, 1280), imgsz)]
+        self.runs = runs
+        # (version, model) replaced as one object so the pair stays consistent
+        self.current = (None, None)
+        self.state = 'loading'
+        self.error = None
+        self.timings = {}
+        self.swaps = 0
+        self.on_swap = []
+        self._failed = None
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+
+    @property
+    def model(self):
+        return self.current[1]
+
+    @property
+    def version(self):
+        return self.current[0]
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        self._ready.wait(timeout)
+        return self.model
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                version = self.registry.active()
+                if version is not None and version != self.version and self._attempt(version) != self._failed:
+                    self._load(version)
+                elif version is None and not self.ready:
+                    raise FileNotFoundError(f"No active model version in {self.registry.root}")
+            except Exception as e:
+                self.error = e
+                if self.model is None:
+                    self.state = 'failed'
+                    self._ready.set()
+                print(f"[ERROR] Model registry: {e}")
+            self._stopped.wait(self.interval)
+
+    def _attempt(self, version):
+        # A version that failed is retried once its directory changes, e.g.
+        # after src/quantize.py --registry-version added the INT8 model
+        try:
+            return version, os.stat(self.registry._path(version)).st_mtime_ns
+        except OSError:
+            return version, None
+
+    def _load(self, version):
+        from src.inference import build_model, warm_up
+        if self.model is not None:
+            self.state = 'swapping'
+        try:
+            start = time.perf_counter()
+            path = self.registry.model_path(version)
+            if not self.registry.verify(version):
+                raise ValueError(f"Checksum mismatch for model version {version}")
+            model = build_model(path, self.backend, self.imgsz)
+            model.model_version = f"{version}:{self.registry.manifest(version)['sha256'][:12]}:{self.backend}"
+            self.timings['load'] = time.perf_counter() - start
+            self.timings['warmup'] = warm_up(model, self.shapes, self.runs)
+        except Exception:
+            self._failed = self._attempt(version)
+            if self.model is not None:
+                self.state = 'ready'
+            raise
+        self.current = (version, model)
+        self.error, self._failed = None, None
+        self.state = 'ready'
+        self._ready.set()
+        self.swaps += 1
+        print(f"✅ Serving model version {version}")
+        for callback in self.on_swap:
+            callback(version, model)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the versioned model registry")
+    parser.add_argument("--registry", type=str, default=DEFAULT_REGISTRY, help="Registry directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="List registered versions")
+    register_parser = commands.add_parser("register", help="Add weights as a new version")
+    register_parser.add_argument("weights", type=str, help="Path to best.pt")
+    register_parser.add_argument("--version", type=str, default=None, help="Version name (default: next vNNN)")
+    register_parser.add_argument("--note", type=str, default="", help="Free-text note stored in the manifest")
+    register_parser.add_argument("--no-activate", action="store_true", help="Register without serving it")
+    activate_parser = commands.add_parser("activate", help="Serve a registered version")
+    activate_parser.add_argument("version", type=str)
+    commands.add_parser("rollback", help="Serve the previously active version again")
+    verify_parser = commands.add_parser("verify", help="Check the checksums of registered versions")
+    verify_parser.add_argument("version", type=str, nargs="?", default=None)
+
+    args = parser.parse_args()
+    registry = ModelRegistry(args.registry)
+
+    try:
+        if args.command == "list":
+            active = registry.active()
+            for manifest in registry.versions():
+                marker = "▶" if manifest["version"] == active else " "
+                created = time.strftime("%Y-%m-%d %H:%M", time.localtime(manifest["created"]))
+                print(f"{marker} {manifest['version']:<10}{created:<18}{manifest['sha256'][:12]:<14}{manifest['note']}")
+        elif args.command == "register":
+            if not os.path.exists(args.weights):
+                print(f"❌ Error: Model file '{args.weights}' not found!")
+                sys.exit(1)
+            version = registry.register(args.weights, version=args.version, activate=not args.no_activate,
+                                        note=args.note)
+            print(f"✅ Registered {args.weights} as {version}" + ("" if args.no_activate else " (active)"))
+        elif args.command == "activate":
+            print(f"✅ Active model version: {registry.activate(args.version)}")
+        elif args.command == "rollback":
+            print(f"⏪ Rolled back to {registry.rollback()}")
+        elif args.command == "verify":
+            versions = [args.version] if args.version else [m["version"] for m in registry.versions()]
+            failed = [version for version in versions if not registry.verify(version)]
+            for version in versions:
+                print(f"{'❌' if version in failed else '✅'} {version}")
+            sys.exit(1 if failed else 0)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
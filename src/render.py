@@ -0,0 +1,134 @@
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+COMPLIANT_COLOR = (0, 255, 0)
+VIOLATION_COLOR = (0, 0, 255)
+
+def class_label(names, cls):
+    """
+    Resolve a class id to its display name.
+    """
+    return names[cls] if names is not None and cls < len(names) else str(cls)
+
+def label_color(label):
+    """
+    Box colour for a label: red for violations ('NO-...'), green otherwise.
+    """
+    return VIOLATION_COLOR if 'NO-' in label else COMPLIANT_COLOR
+
+def _text_is_binary():
+    # OpenCV 4.x rasterises Hershey text without anti-aliasing, so labels can
+    # be baked into a reused overlay through a mask; newer builds blend glyph
+    # edges with the background and labels are drawn onto each frame
+    mask = np.zeros((40, 80), dtype=np.uint8)
+    cv2.putText(mask, 'Ag 0.9', (2, 30), FONT, 0.7, 255, 2)
+    return bool(np.isin(mask, (0, 255)).all())
+
+BINARY_TEXT = _text_is_binary()
+
+class Renderer:
+    """
+    Draw detections in place with as few per-box Python steps as possible.
+
+    Labels and colours are resolved once per class and labels are drawn
+    above all boxes. Label text changes with every confidence and track id,
+    so it is always drawn with cv2.putText rather than cached.
+
+    With reuse, the rendered overlay and its mask are kept, and a frame whose
+    detections equal the previous frame's gets the overlay copied on in one
+    call instead of being redrawn. One reuse renderer per stream.
+    """
+    def __init__(self, thickness=2, font_scale=0.7, reuse=False):
+        self.thickness = thickness
+        self.font_scale = font_scale
+        self.reuse = reuse
+        self._styles = {}
+        self._overlay = None
+        self._mask = None
+        self._previous = None
+        self._labels = []
+        self.reused = 0
+
+    def _class_styles(self, names, classes):
+        """
+        (label, colour) per class id in classes, cached per names table
+        content so tables rebuilt for every request share one entry.
+        """
+        key = tuple(names.values() if isinstance(names, dict) else names) if names is not None else None
+        styles = self._styles.get(key)
+        if styles is None:
+            if len(self._styles) >= 64:
+                self._styles.clear()
+            styles = self._styles[key] = {}
+        for cls in classes:
+            if cls not in styles:
+                label = class_label(names, cls)
+                styles[cls] = (label, label_color(label))
+        return styles
+
+    def _draw_boxes(self, img, detections, names, mask=None):
+        """
+        Draw the boxes and return the labels as (text, origin, colour).
+        """
+        classes = detections.cls.tolist()
+        styles = self._class_styles(names, set(classes))
+        ids = detections.ids.tolist() if detections.ids is not None else None
+        labels = []
+        for i, ((x1, y1, x2, y2), cls, conf) in enumerate(zip(detections.xyxy.astype(np.int32).tolist(), classes,
+                                                               detections.conf.tolist())):
+            label, color = styles[cls]
+            cv2.rectangle(img, (x1, y1), (x2, y2), color, self.thickness)
+            if mask is not None:
+                cv2.rectangle(mask, (x1, y1), (x2, y2), 255, self.thickness)
+            text = f'{label} {conf:.2f}' if ids is None else f'#{ids[i]} {label} {conf:.2f}'
+            labels.append((text, (x1, y1 - 10), color))
+        return labels
+
+    def _draw_labels(self, img, labels, mask=None):
+        for text, origin, color in labels:
+            cv2.putText(img, text, origin, FONT, self.font_scale, color, self.thickness)
+            if mask is not None:
+                cv2.putText(mask, text, origin, FONT, self.font_scale, 255, self.thickness)
+
+    def _unchanged(self, img, detections, names):
+        previous = self._previous
+        if previous is None:
+            return False
+        shape, prev_names, prev = previous
+        if shape != img.shape or prev_names is not names or len(prev) != len(detections):
+            return False
+        if prev is detections:
+            return True
+        same_ids = (prev.ids is None) == (detections.ids is None) and (
+            prev.ids is None or np.array_equal(prev.ids, detections.ids))
+        return (same_ids and np.array_equal(prev.xyxy, detections.xyxy)
+                and np.array_equal(prev.conf, detections.conf) and np.array_equal(prev.cls, detections.cls))
+
+    def draw(self, img, detections, names):
+        """
+        Draw boxes and labels onto img in place and return it.
+        """
+        if len(detections) == 0:
+            return img
+        if not self.reuse:
+            self._draw_labels(img, self._draw_boxes(img, detections, names))
+            return img
+        if not self._unchanged(img, detections, names):
+            if self._overlay is None or self._overlay.shape != img.shape:
+                self._overlay = np.empty_like(img)
+                self._mask = np.zeros(img.shape[:2], dtype=np.uint8)
+            else:
+                self._mask[:] = 0
+            self._labels = self._draw_boxes(self._overlay, detections, names, self._mask)
+            if BINARY_TEXT:
+                self._draw_labels(self._overlay, self._labels, self._mask)
+            self._previous = (img.shape, names, detections)
+        else:
+            self.reused += 1
+        cv2.copyTo(self._overlay, self._mask, img)
+        if not BINARY_TEXT:
+            # Anti-aliased text blends with the frame underneath, so it is
+            # drawn onto each frame rather than baked into the overlay
+            self._draw_labels(img, self._labels)
+        return img
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Micro-batching Inference Scheduler
+One thread owns the shared model; requests from every Streamlit session and
+webcam stream are queued, grouped into micro-batches within a short wait
+window and answered through futures
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.metrics import METRICS
+
+class InferenceScheduler:
+    """
+    Serialises all calls to one model and batches them.
+
+    submit() queues a single frame and returns a Future resolving to its
+    ultralytics result list. The worker thread takes the oldest request, then
+    keeps collecting for up to max_wait_ms or until max_batch frames are
+    waiting, and runs every group of compatible requests (same frame shape and
+    predict arguments) as one forward pass. Under light load a request waits
+    at most max_wait_ms; under heavy load batches fill up and throughput grows
+    with the number of callers instead of each one queueing for the model.
+
+    The scheduler is also callable like the model itself (model(img, ...),
+    including lists of frames) and exposes its names and model_version, so
+    detect_image, predict_batch and the webcam transformer use it unchanged.
+    Pass model_source, a callable returning the current model, to follow a
+    hot-swapping ModelLoader or RegistryWatcher.
+    """
+    def __init__(self, model=None, model_source=None, max_batch=8, max_wait_ms=8.0):
+        if model is None and model_source is None:
+            raise ValueError("InferenceScheduler needs a model or a model_source")
+        self._model = model
+        self.model_source = model_source
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def model(self):
+        return self.model_source() if self.model_source is not None else self._model
+
+    @property
+    def names(self):
+        return getattr(self.model, 'names', None)
+
+    @property
+    def model_version(self):
+        return getattr(self.model, 'model_version', None)
+
+    def submit(self, img, **kwargs):
+        """
+        Queue one frame (NumPy array) for inference with the given predict
+        arguments and return a Future of its result list.
+        """
+        kwargs.pop('verbose', None)
+        future = Future()
+        key = (img.shape, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+        # Checked and queued under the lock stop() takes, so a request is
+        # either refused or queued before the worker drains the queue
+        with self._lock:
+            if self._stopped.is_set():
+                raise RuntimeError("InferenceScheduler has been stopped")
+            self._queue.put((key, img, kwargs, future, time.perf_counter()))
+        return future
+
+    def __call__(self, source, verbose=False, **kwargs):
+        """
+        Blocking, model-like call: a frame or a list of frames in, a list of
+        results out.
+        """
+        frames = source if isinstance(source, (list, tuple)) else [source]
+        futures = [self.submit(np.asarray(frame), **kwargs) for frame in frames]
+        return [result for future in futures for result in future.result()]
+
+    def stats(self):
+        with self._lock:
+            return {'requests': self.requests, 'batches': self.batches, 'max_batch': self.max_batch,
+                    'mean_batch': self.requests / self.batches if self.batches else 0.0,
+                    'queued': self._queue.qsize()}
+
+    def stop(self):
+        with self._lock:
+            self._stopped.set()
+
+    def _collect(self):
+        """
+        Block for the first request, then gather more until the wait window
+        closes or max_batch requests are in hand.
+        """
+        try:
+            pending = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while len(pending) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                pending.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return pending
+
+    def _run(self):
+        while not self._stopped.is_set():
+            groups = {}
+            for request in self._collect():
+                groups.setdefault(request[0], []).append(request)
+            for group in groups.values():
+                self._run_batch(group)
+        # Fail whatever is still queued instead of leaving callers blocked
+        while True:
+            try:
+                _, _, _, future, _ = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            future.set_exception(RuntimeError("InferenceScheduler has been stopped"))
+
+    def _run_batch(self, group):
+        start = time.perf_counter()
+        for _, _, _, _, queued in group:
+            METRICS.observe('scheduler', 'queue', (start - queued) * 1000)
+        try:
+            model = self.model
+            if model is None:
+                raise RuntimeError("Model is not loaded")
+            results = model([img for _, img, _, _, _ in group], verbose=False, **group[0][2])
+        except Exception as e:
+            for _, _, _, future, _ in group:
+                future.set_exception(e)
+            return
+        METRICS.observe('scheduler', 'inference', (time.perf_counter() - start) * 1000)
+        with self._lock:
+            self.requests += len(group)
+            self.batches += 1
+        for (_, _, _, future, _), result in zip(group, results):
+            future.set_result([result])
+
+def run_clients(call, frames, clients, requests):
+    """
+    clients threads each making requests calls; returns frames per second
+    and the mean latency per request in ms.
+    """
+    latencies = []
+    lock = threading.Lock()
+
+    def client(index):
+        for i in range(requests):
+            start = time.perf_counter()
+            call(frames[(index + i) % len(frames)])
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return clients * requests / elapsed, float(np.mean(latencies))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare a shared locked model against the micro-batching scheduler")
+    parser.add_argument("--model", type=str, default="app/models/best.pt",
+                        help="Path to model weights (YOLOv8n with random weights when missing)")
+    parser.add_argument("--backend", type=str, default="pytorch", help="Inference backend (pytorch, onnx, openvino)")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 10], help="Concurrent callers to simulate")
+    parser.add_argument("--requests", type=int, default=10, help="Frames per caller")
+    parser.add_argument("--max-batch", type=int, default=8, help="Largest micro-batch")
+    parser.add_argument("--max-wait-ms", type=float, default=8.0, help="How long a batch waits to fill up")
+    parser.add_argument("--height", type=int, default=480, help="Frame height")
+    parser.add_argument("--width", type=int, default=640, help="Frame width")
+
+    args = parser.parse_args()
+
+    print("🎯 AI CCTV Surveillance - Inference Scheduler")
+    print("=" * 50)
+
+    from src.benchmark import load_benchmark_model, synthetic_frame
+    try:
+        model, model_source = load_benchmark_model(args.model, args.backend)
+    except Exception as e:
+        print(f"❌ Error loading model: {e}")
+        sys.exit(1)
+    print(f"✅ Model: {model_source}")
+
+    frames = [synthetic_frame((args.height, args.width), seed) for seed in range(4)]
+    model_lock = threading.Lock()
+
+    def locked(img):
+        with model_lock:
+            return model(img, verbose=False)
+
+    scheduler = InferenceScheduler(model, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+    for img in frames:
+        locked(img)
+        scheduler(img)
+
+    print(f"\n{'Clients':>8}{'Locked FPS':>12}{'Sched. FPS':>12}{'Locked ms':>12}{'Sched. ms':>12}{'Batch':>8}")
+    print("-" * 64)
+    for clients in args.clients:
+        locked_fps, locked_ms = run_clients(locked, frames, clients, args.requests)
+        before = scheduler.stats()
+        scheduled_fps, scheduled_ms = run_clients(scheduler, frames, clients, args.requests)
+        after = scheduler.stats()
+        mean_batch = (after['requests'] - before['requests']) / max(after['batches'] - before['batches'], 1)
+        print(f"{clients:>8}{locked_fps:>12.1f}{scheduled_fps:>12.1f}{locked_ms:>12.1f}{scheduled_ms:>12.1f}"
+              f"{mean_batch:>8.1f}")
+    print("-" * 64)
+    scheduler.stop()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Inference Server
+Headless detection service on local HTTP, so inference scales separately from
+the Streamlit UI. Requests from all clients are micro-batched onto one model,
+and a bounded admission limit answers 503 instead of queueing without end
+
+  POST /detect   one image: raw JPEG/PNG bytes, or JSON {"image": base64,
+                 "annotate": bool, "zones": [...]}; ?annotate=1 for raw bodies
+  POST /batch    JSON {"images": [base64, ...], "annotate": bool}
+  GET  /healthz  model state, version and queue depth
+  GET  /metrics  Prometheus stage latencies
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.inference import ModelLoader, ResultCache, detect_image, predict_batch
+from src.metrics import METRICS
+from src.registry import ModelRegistry, RegistryWatcher
+from src.scheduler import InferenceScheduler
+from src.zones import ZoneFilter
+
+DEFAULT_PORT = 8600
+
+def encode_image(img, format="JPEG", quality=90):
+    """Base64 text of an RGB array or PIL image encoded as JPEG or PNG."""
+    image = img if isinstance(img, Image.Image) else Image.fromarray(img)
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **({"quality": quality} if format == "JPEG" else {}))
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+def decode_image(data):
+    """PIL image from base64 text or raw encoded bytes."""
+    if isinstance(data, str):
+        data = base64.b64decode(data)
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+def result_payload(result, annotate=False, version=None):
+    """JSON-ready dict for one DetectionResult."""
+    payload = {
+        "detections": result.detections.to_dict(result.names),
+        "counts": result.counts,
+        "timings": {stage: round(ms, 3) for stage, ms in result.timings.items() if ms is not None},
+        "names": list(result.names.values()) if isinstance(result.names, dict) else result.names,
+        "model_version": version,
+    }
+    if annotate:
+        payload["annotated_jpeg"] = encode_image(result.image)
+    return payload
+
+class ServiceUnavailable(Exception):
+    """The model is not loaded yet or more images are in flight than admitted; retry later."""
+
+class InferenceService:
+    """
+    The model loader, scheduler, result cache and admission control behind
+    the HTTP handler. At most max_pending images are in flight at once;
+    further requests are refused so a burst degrades into fast 503s and
+    client retries rather than an unbounded queue and timeouts.
+    """
+    def __init__(self, loader, max_batch=8, max_wait_ms=8.0, max_pending=32, cache=None):
+        self.loader = loader
+        self.scheduler = InferenceScheduler(model_source=lambda: loader.model, max_batch=max_batch,
+                                            max_wait_ms=max_wait_ms)
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.cache = cache
+        self.pending = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._zones = {}
+
+    def _admit(self, count):
+        with self._lock:
+            if self.pending + count > self.max_pending:
+                self.rejected += 1
+                raise ServiceUnavailable(f"{self.pending} images in flight, limit {self.max_pending}")
+            self.pending += count
+
+    def _release(self, count):
+        with self._lock:
+            self.pending -= count
+
+    def _model(self):
+        if self.loader.model is None:
+            raise ServiceUnavailable(f"Model not ready ({self.loader.state})")
+        return self.scheduler
+
+    def _zone_filter(self, zones):
+        if not zones:
+            return None
+        signature = json.dumps(zones, sort_keys=True)
+        if signature not in self._zones:
+            self._zones[signature] = ZoneFilter(zones)
+        return self._zones[signature]
+
+    def detect(self, image, annotate=False, zones=None):
+        self._admit(1)
+        try:
+            result = detect_image(self._model(), image, zone_filter=self._zone_filter(zones), cache=self.cache,
+                                  draw=annotate)
+            return result_payload(result, annotate, self.scheduler.model_version)
+        finally:
+            self._release(1)
+
+    def detect_batch(self, images, annotate=False):
+        if len(images) > self.max_pending:
+            raise ValueError(f"Batch of {len(images)} images exceeds the limit of {self.max_pending}")
+        self._admit(len(images))
+        try:
+            results = predict_batch(self._model(), images, batch_size=self.max_batch, draw=annotate,
+                                    cache=self.cache)
+            version = self.scheduler.model_version
+            return [result_payload(result, annotate, version) for result in results]
+        finally:
+            self._release(len(images))
+
+    def health(self):
+        with self._lock:
+            pending, rejected = self.pending, self.rejected
+        return {
+            "status": self.loader.state,
+            "model_version": self.scheduler.model_version if self.loader.model is not None else None,
+            "error": str(self.loader.error) if self.loader.error else None,
+            "pending": pending,
+            "max_pending": self.max_pending,
+            "rejected": rejected,
+            "scheduler": self.scheduler.stats(),
+        }
+
+def make_handler(service, max_body_mb=32):
+    class InferenceHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, body, content_type="application/json", headers=None):
+            if not isinstance(body, bytes):
+                body = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == "/healthz":
+                health = service.health()
+                self._send(200 if health["status"] in ("ready", "swapping") else 503, health)
+            elif path == "/metrics":
+                self._send(200, METRICS.render().encode(), "text/plain; version=0.0.4; charset=utf-8")
+            else:
+                self._send(404, {"error": f"Unknown path {path}"})
+
+        def do_POST(self):
+            start = time.perf_counter()
+            url = urlparse(self.path)
+            length = int(self.headers.get("Content-Length", 0))
+            if length > max_body_mb * 2**20:
+                self._send(413, {"error": f"Request body larger than {max_body_mb} MB"})
+                self.close_connection = True
+                return
+            body = self.rfile.read(length)
+            try:
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    request = json.loads(body)
+                else:
+                    query = parse_qs(url.query)
+                    request = {"image": body, "annotate": query.get("annotate", ["0"])[0] in ("1", "true")}
+                annotate = bool(request.get("annotate", False))
+                if url.path == "/detect":
+                    response = service.detect(decode_image(request["image"]), annotate, request.get("zones"))
+                elif url.path == "/batch":
+                    images = [decode_image(image) for image in request["images"]]
+                    response = {"results": service.detect_batch(images, annotate)}
+                else:
+                    self._send(404, {"error": f"Unknown path {url.path}"})
+                    return
+            except ServiceUnavailable as e:
+                self._send(503, {"error": str(e)}, headers={"Retry-After": "1"})
+                return
+            except (KeyError, ValueError, OSError) as e:
+                self._send(400, {"error": f"Bad request: {e}"})
+                return
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+                return
+            self._send(200, response)
+            METRICS.observe("server", "total", (time.perf_counter() - start) * 1000)
+
+        def log_message(self, format, *args):
+            pass
+
+    return InferenceHandler
+
+def serve(service, host="127.0.0.1", port=DEFAULT_PORT, max_body_mb=32):
+    """
+    Serve the API from a daemon thread. Returns the server; call shutdown()
+    to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(service, max_body_mb))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve detection over local HTTP with dynamic batching")
+    parser.add_argument("--model", type=str, default="app/models/best.pt", help="Path to model weights")
+    parser.add_argument("--registry", type=str, default=None,
+                        help="Serve the registry's active model and hot-swap when it changes (overrides --model)")
+    parser.add_argument("--backend", type=str, default="pytorch", help="Inference backend (pytorch, onnx, openvino)")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--max-batch", type=int, default=8, help="Largest micro-batch")
+    parser.add_argument("--max-wait-ms", type=float, default=8.0, help="How long a batch waits to fill up")
+    parser.add_argument("--max-pending", type=int, default=32, help="Images in flight before answering 503")
+    parser.add_argument("--max-body-mb", type=int, default=32, help="Largest accepted request body")
+    parser.add_argument("--cache-items", type=int, default=256, help="Result cache size (0 disables it)")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Also keep cached results on disk here")
+    parser.add_argument("--cache-disk-items", type=int, default=10000,
+                        help="Most results kept in --cache-dir before the oldest are deleted")
+
+    args = parser.parse_args()
+
+    print("🎯 AI CCTV Surveillance - Inference Server")
+    print("=" * 50)
+
+    if args.registry:
+        loader = RegistryWatcher(ModelRegistry(args.registry), backend=args.backend)
+    elif os.path.exists(args.model):
+        loader = ModelLoader(args.model, backend=args.backend)
+    else:
+        print(f"❌ Error: Model file '{args.model}' not found!")
+        sys.exit(1)
+    loader.start()
+
+    cache = ResultCache(args.cache_items, args.cache_dir, args.cache_disk_items) if args.cache_items else None
+    service = InferenceService(loader, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms,
+                               max_pending=args.max_pending, cache=cache)
+    try:
+        server = serve(service, args.host, args.port, args.max_body_mb)
+    except OSError as e:
+        print(f"❌ Error: cannot listen on {args.host}:{args.port}: {e}")
+        sys.exit(1)
+    print(f"🌐 Listening on http://{args.host}:{args.port} (model loading in the background)")
+
+    if loader.wait() is None:
+        print(f"❌ Error loading model: {loader.error}")
+        server.shutdown()
+        sys.exit(1)
+    print("✅ Model ready")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("\n⏹️ Shutting down")
+        server.shutdown()
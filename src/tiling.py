@@ -0,0 +1,55 @@
+import cv2
+import numpy as np
+
+def tile_starts(length, tile, overlap):
+    """
+    Start offsets of overlapping tiles covering [0, length). The last tile is
+    aligned to the end so no tile runs past the frame.
+    """
+    if length <= tile:
+        return [0]
+    step = max(1, int(tile * (1 - overlap)))
+    starts = list(range(0, length - tile, step))
+    return starts + [length - tile]
+
+def tile_grid(shape, tile=640, overlap=0.2):
+    """
+    Tiles covering a frame of (height, width) shape as xyxy rectangles.
+    """
+    h, w = shape[:2]
+    return np.array([[x, y, min(x + tile, w), min(y + tile, h)]
+                     for y in tile_starts(h, tile, overlap)
+                     for x in tile_starts(w, tile, overlap)], dtype=np.int64)
+
+def select_tiles(tiles, focus_boxes, margin=32):
+    """
+    Keep only the tiles that intersect any focus box (grown by margin pixels).
+    """
+    focus = np.asarray(focus_boxes, dtype=np.float32).reshape(-1, 4)
+    if len(focus) == 0:
+        return tiles[:0]
+    focus = focus + np.array([-margin, -margin, margin, margin], dtype=np.float32)
+    overlaps = ((tiles[:, None, 0] < focus[None, :, 2]) & (tiles[:, None, 2] > focus[None, :, 0]) &
+                (tiles[:, None, 1] < focus[None, :, 3]) & (tiles[:, None, 3] > focus[None, :, 1]))
+    return tiles[overlaps.any(axis=1)]
+
+def focus_person_boxes(detections, names):
+    """
+    Boxes of the Person detections to focus tiles on, or None when no person
+    was seen so the whole grid is tiled.
+    """
+    names = names.items() if isinstance(names, dict) else enumerate(names)
+    persons = detections.filter(classes=[i for i, n in names if n == 'Person'])
+    return persons.xyxy if len(persons) else None
+
+def merge_detections(detections, iou=0.5, conf=0.0):
+    """
+    Class-aware NMS over detections gathered from several tiles, removing the
+    duplicates produced where tiles overlap.
+    """
+    if len(detections) == 0:
+        return detections
+    xywh = detections.xyxy.copy()
+    xywh[:, 2:] -= xywh[:, :2]
+    keep = cv2.dnn.NMSBoxesBatched(xywh.tolist(), detections.conf.tolist(), detections.cls.tolist(), conf, iou)
+    return detections[np.asarray(keep, dtype=np.int64).reshape(-1)]
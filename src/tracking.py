@@ -0,0 +1,164 @@
+import numpy as np
+
+from src.detections import Detections
+
+def iou_matrix(a, b):
+    """
+    Pairwise IoU between two sets of xyxy boxes, shape (len(a), len(b)).
+    """
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+class Track:
+    """
+    One tracked object under a constant velocity model. On detector frames
+    the box snaps to the detection; the velocity is set from the first two
+    detections and afterwards smoothed towards the measured displacement per
+    frame, so a single noisy box does not throw the prediction off.
+    """
+    def __init__(self, track_id, box, conf, cls):
+        self.id = track_id
+        self.box = np.asarray(box, dtype=np.float32)
+        self.measured = self.box.copy()
+        self.velocity = np.zeros(4, dtype=np.float32)
+        self.conf = float(conf)
+        self.detected_conf = self.conf
+        self.cls = int(cls)
+        self.hits = 1
+        self.misses = 0
+        self.frames_since_update = 0
+        # Frames since a detector run first failed to match the track
+        self.unmatched = 0
+
+    def predict(self, decay):
+        self.box = self.box + self.velocity
+        self.conf *= decay
+        self.frames_since_update += 1
+        if self.misses:
+            self.unmatched += 1
+
+    def correct(self, box, conf, smoothing):
+        box = np.asarray(box, dtype=np.float32)
+        # Displacement per frame over every frame since the last detection
+        velocity = (box - self.measured) / max(self.frames_since_update, 1)
+        if self.hits == 1:
+            self.velocity = velocity
+        else:
+            self.velocity = self.velocity + smoothing * (velocity - self.velocity)
+        self.box = box
+        self.measured = box.copy()
+        self.conf = self.detected_conf = float(conf)
+        self.hits += 1
+        self.misses = 0
+        self.frames_since_update = 0
+        self.unmatched = 0
+
+class IoUTracker:
+    """
+    Lightweight multi-object tracker used between detector runs.
+
+    update() matches fresh detections to existing tracks by IoU (same class
+    only) and corrects them; step() propagates all tracks one frame forward
+    without a detection, decaying their confidence. Class and confidence are
+    carried forward, and every track keeps a stable id.
+    """
+    def __init__(self, iou_threshold=0.3, max_misses=3, velocity_smoothing=0.5,
+                 conf_decay=0.95, confident=0.5, redetect_after=2):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.velocity_smoothing = velocity_smoothing
+        self.conf_decay = conf_decay
+        self.confident = confident
+        self.redetect_after = redetect_after
+        self.tracks = []
+        self._next_id = 1
+
+    def update(self, detections):
+        """
+        Feed the Detections of a frame the detector ran on.
+        """
+        boxes, confs, clss = detections.xyxy, detections.conf, detections.cls
+        for track in self.tracks:
+            track.predict(1.0)
+        track_boxes = np.array([t.box for t in self.tracks], dtype=np.float32).reshape(-1, 4)
+        iou = iou_matrix(track_boxes, boxes)
+        if iou.size:
+            same_class = np.array([t.cls for t in self.tracks])[:, None] == clss[None, :]
+            iou[~same_class] = 0.0
+
+        matched_tracks, matched_dets = set(), set()
+        # Greedy assignment, highest IoU first
+        for t, d in zip(*np.unravel_index(np.argsort(-iou, axis=None), iou.shape)):
+            if iou[t, d] < self.iou_threshold:
+                break
+            if t in matched_tracks or d in matched_dets:
+                continue
+            self.tracks[t].correct(boxes[d], confs[d], self.velocity_smoothing)
+            matched_tracks.add(t)
+            matched_dets.add(d)
+
+        # A track seen only once has no velocity yet and may have moved off
+        # its own box; match what is left by centre distance within its size
+        fresh = [t for t in range(len(self.tracks)) if t not in matched_tracks and self.tracks[t].hits < 2]
+        if fresh and len(matched_dets) < len(boxes):
+            centres = (boxes[:, :2] + boxes[:, 2:]) / 2
+            pairs = []
+            for t in fresh:
+                track = self.tracks[t]
+                size = np.hypot(*(track.box[2:] - track.box[:2]))
+                distance = np.hypot(*(centres - (track.box[:2] + track.box[2:]) / 2).T)
+                pairs += [(distance[d], t, d) for d in range(len(boxes))
+                          if d not in matched_dets and clss[d] == track.cls and distance[d] <= size]
+            for _, t, d in sorted(pairs):
+                if t in matched_tracks or d in matched_dets:
+                    continue
+                self.tracks[t].correct(boxes[d], confs[d], self.velocity_smoothing)
+                matched_tracks.add(t)
+                matched_dets.add(d)
+
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        for d in range(len(boxes)):
+            if d not in matched_dets:
+                self.tracks.append(Track(self._next_id, boxes[d], confs[d], clss[d]))
+                self._next_id += 1
+        return self.current()
+
+    def step(self):
+        """
+        Propagate all tracks one frame forward without a detection.
+        """
+        for track in self.tracks:
+            track.predict(self.conf_decay)
+        return self.current()
+
+    @property
+    def needs_detection(self):
+        """
+        True when the detector should run on the next frame regardless of the
+        schedule: a track detected with at least `confident` confidence has
+        gone unmatched for more than redetect_after frames. A single missed
+        detection of a flickering object or a new track does not trigger it,
+        so skipped frames keep saving inference on real footage.
+        """
+        return any(t.misses and t.detected_conf >= self.confident and t.unmatched > self.redetect_after
+                   for t in self.tracks)
+
+    def current(self):
+        """
+        Current tracked boxes as Detections carrying their track ids.
+        """
+        return Detections(np.array([t.box for t in self.tracks]).reshape(-1, 4),
+                          [t.conf for t in self.tracks], [t.cls for t in self.tracks],
+                          [t.id for t in self.tracks])
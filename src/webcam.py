@@ -0,0 +1,271 @@
+import time
+import threading
+
+import streamlit as st
+from av.video.frame import VideoFrame
+from streamlit_webrtc import webrtc_streamer, VideoTransformerBase
+
+from src.adaptive import AdaptiveResolution
+from src.detections import Detections
+from src.inference import CLASS_NAMES, LatestFrameBuffer, draw_detections, predict_tiled, rect_shape
+from src.metrics import METRICS
+from src.motion import MotionGate
+from src.render import Renderer
+from src.tiling import focus_person_boxes
+from src.tracking import IoUTracker
+
+class AsyncInferenceWorker(threading.Thread):
+    """
+    Background thread that runs the model on the newest frame from a
+    LatestFrameBuffer and keeps the most recent detections for overlaying.
+    An optional detect callable replaces the plain model call.
+    """
+    def __init__(self, get_model, detect=None):
+        super().__init__(daemon=True)
+        self.get_model = get_model
+        self.detect = detect
+        self.buffer = LatestFrameBuffer()
+        self._lock = threading.Lock()
+        self._detections = Detections.empty()
+        self._stopped = threading.Event()
+        self.inferences = 0
+
+    def submit(self, img):
+        self.buffer.put(img)
+
+    def latest(self):
+        with self._lock:
+            return self._detections
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        while not self._stopped.is_set():
+            img = self.buffer.get(timeout=0.5)
+            model = self.get_model()
+            if img is None or model is None:
+                continue
+            try:
+                if self.detect is not None:
+                    detections = self.detect(img)
+                else:
+                    with METRICS.timer('webcam', 'detect'):
+                        detections = Detections.from_results(model(img, verbose=False))
+            except Exception as e:
+                print(f"[ERROR] Async inference failed: {e}")
+                continue
+            with self._lock:
+                self._detections = detections
+            self.inferences += 1
+
+class YOLOVideoTransformer(VideoTransformerBase):
+    def __init__(self, async_mode=False, detect_every=1):
+        self.model = None
+        # Optional callable returning the current model, read once per frame
+        # so a hot-swapped model takes over on the next frame
+        self.model_source = None
+        self._frame_start = time.perf_counter()
+        # Redraws only when the detections change between frames
+        self.renderer = Renderer(reuse=True)
+        self.async_mode = async_mode
+        self.worker = None
+        self.detect_every = detect_every
+        self.tracker = IoUTracker()
+        self.frame_index = 0
+        self.motion_gate = None
+        self.last_detections = Detections.empty()
+        # Tiled mode: None, or the tile size; tile_focus is None, 'persons' or 'motion'
+        self.tile_size = None
+        self.tile_overlap = 0.2
+        self.tile_focus = None
+        self.zone_filter = None
+        # AdaptiveResolution controller picking imgsz under a latency budget
+        self.resolution = None
+        # Rectangular inference: input shape per imgsz, fixed on the first frame
+        self.rect = False
+        self.input_shapes = {}
+
+    def _motion_allows(self, img):
+        return self.motion_gate is None or self.motion_gate.should_infer(img)
+
+    def _detect(self, img):
+        """
+        One detector pass over img: zone crops when a zone_filter is set,
+        tiled when tile_size is set, otherwise the whole frame.
+        """
+        if self.zone_filter is not None:
+            start = time.perf_counter()
+            imgsz = self.resolution.imgsz if self.resolution is not None else 640
+            detections = self.zone_filter.detect(self.model, img, imgsz, rect=self.rect)
+            detect_ms = (time.perf_counter() - start) * 1000
+            if self.resolution is not None:
+                self.resolution.record(detect_ms)
+            METRICS.observe('webcam', 'detect', detect_ms)
+            return detections
+        if not self.tile_size:
+            start = time.perf_counter()
+            if self.resolution is None and not self.rect:
+                results = self.model(img, verbose=False)
+            else:
+                results = self.model(img, imgsz=self._input_size(img), verbose=False)
+            detect_ms = (time.perf_counter() - start) * 1000
+            if self.resolution is not None:
+                self.resolution.record(detect_ms)
+            if results:
+                METRICS.observe_timings('webcam', getattr(results[0], 'speed', None) or {})
+            METRICS.observe('webcam', 'detect', detect_ms)
+            return Detections.from_results(results)
+        focus = None
+        if self.tile_focus == 'persons':
+            focus = focus_person_boxes(self.last_detections, getattr(self.model, 'names', None) or CLASS_NAMES)
+        elif self.tile_focus == 'motion' and self.motion_gate is not None:
+            focus = self.motion_gate.motion_boxes(img.shape)
+        with METRICS.timer('webcam', 'detect'):
+            detections = predict_tiled(self.model, img, tile_size=self.tile_size, overlap=self.tile_overlap,
+                                       focus_boxes=focus, draw=False).detections
+        # Async and tracking modes keep no last_detections of their own
+        self.last_detections = detections
+        return detections
+
+    def recv(self, frame):
+        self._frame_start = time.perf_counter()
+        img = frame.to_ndarray(format="bgr24")
+        METRICS.observe('webcam', 'decode', (time.perf_counter() - self._frame_start) * 1000)
+        if self.model_source is not None:
+            self.model = self.model_source()
+        if self.model is not None and self.async_mode:
+            return self._recv_async(img)
+        if self.model is not None and self.detect_every > 1:
+            return self._recv_tracked(img)
+        if self.model is not None:
+            if self._motion_allows(img):
+                self.last_detections = self._detect(img)
+            return self._overlay(img, self.last_detections)
+        return VideoFrame.from_ndarray(img, format="bgr24")
+
+    def _input_size(self, img):
+        """
+        Model input size for img: the adaptive size, or the stream's fixed
+        rectangular shape for it when rect is on.
+        """
+        imgsz = self.resolution.imgsz if self.resolution is not None else 640
+        if not self.rect:
+            return imgsz
+        if imgsz not in self.input_shapes:
+            # Fixed per stream so exported backends keep reusing one shape
+            self.input_shapes[imgsz] = rect_shape(img.shape, imgsz)
+        return self.input_shapes[imgsz]
+
+    def _overlay(self, img, detections):
+        draw_start = time.perf_counter()
+        if self.zone_filter is not None:
+            self.zone_filter.draw(img)
+        draw_detections(img, detections, getattr(self.model, 'names', None), renderer=self.renderer)
+        encode_start = time.perf_counter()
+        frame = VideoFrame.from_ndarray(img, format="bgr24")
+        end = time.perf_counter()
+        METRICS.observe('webcam', 'draw', (encode_start - draw_start) * 1000)
+        METRICS.observe('webcam', 'encode', (end - encode_start) * 1000)
+        METRICS.observe('webcam', 'total', (end - self._frame_start) * 1000)
+        return frame
+
+    def _recv_async(self, img):
+        """
+        Hand the frame to the background worker and return it straight away
+        with the most recent detections drawn on top.
+        """
+        if self.worker is None or not self.worker.is_alive():
+            self.worker = AsyncInferenceWorker(lambda: self.model, detect=self._detect)
+            self.worker.start()
+        if self._motion_allows(img):
+            self.worker.submit(img.copy())
+        return self._overlay(img, self.worker.latest())
+
+    def _recv_tracked(self, img):
+        """
+        Run the detector every detect_every frames, or sooner when the tracker
+        loses confidence, and propagate tracked boxes on the frames between.
+        """
+        scheduled = self.frame_index % self.detect_every == 0 or self.tracker.needs_detection
+        if scheduled and self._motion_allows(img):
+            detections = self.tracker.update(self._detect(img))
+            self.frame_index = 0
+        else:
+            detections = self.tracker.step()
+        self.frame_index += 1
+        return self._overlay(img, detections)
+
+    def on_ended(self):
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+
+def get_or_create_transformer(model, async_mode=False, detect_every=1, motion_threshold=None, zone_filter=None,
+                              latency_budget_ms=None, rect=False, model_source=None, tile_size=None,
+                              tile_overlap=0.2, tile_focus=None):
+    # Always create or update the transformer in session state
+    if "yolo_transformer" not in st.session_state or st.session_state["yolo_transformer"] is None:
+        st.session_state["yolo_transformer"] = YOLOVideoTransformer(async_mode=async_mode, detect_every=detect_every)
+    transformer = st.session_state["yolo_transformer"]
+    transformer.model = model
+    transformer.model_source = model_source
+    transformer.async_mode = async_mode
+    transformer.detect_every = detect_every
+    transformer.zone_filter = zone_filter
+    transformer.rect = rect
+    if tile_focus not in (None, 'persons', 'motion'):
+        raise ValueError(f"Unknown tile_focus '{tile_focus}', expected None, 'persons' or 'motion'")
+    transformer.tile_size = tile_size
+    transformer.tile_overlap = tile_overlap
+    transformer.tile_focus = tile_focus
+    if motion_threshold is None:
+        transformer.motion_gate = None
+    elif transformer.motion_gate is None:
+        transformer.motion_gate = MotionGate(threshold=motion_threshold)
+    else:
+        # Keep the counters across reruns, only move the threshold
+        transformer.motion_gate.threshold = motion_threshold
+    if latency_budget_ms is None:
+        transformer.resolution = None
+    elif transformer.resolution is None:
+        transformer.resolution = AdaptiveResolution(budget_ms=latency_budget_ms)
+    else:
+        transformer.resolution.budget_ms = latency_budget_ms
+    return transformer
+
+def predict_webcam(model, async_mode=True, detect_every=1, motion_threshold=None, zone_filter=None,
+                   latency_budget_ms=None, rect=True, model_source=None, tile_size=None, tile_overlap=0.2,
+                   tile_focus=None):
+    """
+    Stream the browser webcam through the model. With async_mode the video is
+    never held back by inference: detections lag by at most one inference.
+    With detect_every > 1 (synchronous mode only) the detector runs every N
+    frames and a tracker carries the boxes in between. A motion_threshold
+    enables the motion gate, which reuses the previous detections while the
+    changed-pixel fraction stays below it. A zone_filter limits inference to
+    the camera's configured zones. latency_budget_ms lets the stream drop to a
+    smaller input size under load instead of dropping frames. rect runs a
+    fixed rectangular input matched to the camera's aspect ratio. tile_size
+    runs tiled inference for high-resolution cameras; tile_focus 'persons'
+    or 'motion' limits it to tiles where persons or motion were last seen.
+    model_source, a callable returning the current model, lets a model
+    swapped in by the registry take over without restarting the stream.
+    """
+    st.title("Real-time Webcam Detection")
+
+    webrtc_streamer(
+        key="yolo-webcam",
+        video_transformer_factory=lambda: get_or_create_transformer(model, async_mode=async_mode,
+                                                                    detect_every=detect_every,
+                                                                    motion_threshold=motion_threshold,
+                                                                    zone_filter=zone_filter,
+                                                                    latency_budget_ms=latency_budget_ms,
+                                                                    rect=rect,
+                                                                    model_source=model_source,
+                                                                    tile_size=tile_size,
+                                                                    tile_overlap=tile_overlap,
+                                                                    tile_focus=tile_focus),
+        media_stream_constraints={"video": True, "audio": False},
+        async_transform=True,
+    )
@@ -0,0 +1,113 @@
+import json
+import math
+
+import cv2
+import numpy as np
+
+from src.detections import Detections
+from src.inference import predict_batch
+from src.tiling import merge_detections
+
+# Per-camera zone polygons, points normalised to [0, 1] of frame width/height:
+# {"cam-01": {"zones": [{"name": "scaffold", "polygon": [[0.1, 0.2], ...]}]}}
+DEFAULT_ZONES_PATH = "config/zones.json"
+
+def load_zones(path=DEFAULT_ZONES_PATH):
+    """
+    Read the zone config and return {camera_id: ZoneFilter}.
+    """
+    with open(path, "r") as f:
+        config = json.load(f)
+    return {camera_id: ZoneFilter(camera.get("zones", [])) for camera_id, camera in config.items()}
+
+class ZoneFilter:
+    """
+    Restrict detection to the configured polygon zones of one camera.
+
+    Only the bounding rectangles of the zones are cropped and run through the
+    model, each letterboxed to its own stride-aligned rectangle at the frame's
+    scale, so a small zone costs few pixels. Detections whose centre falls outside every
+    polygon are dropped using a mask that is computed once per frame size.
+    """
+    def __init__(self, zones):
+        self.zones = [(zone.get("name", f"zone-{i}"), np.asarray(zone["polygon"], dtype=np.float32))
+                      for i, zone in enumerate(zones)]
+        # Identifies the zone layout in ResultCache keys
+        self.signature = json.dumps(zones, sort_keys=True)
+        self._cache = {}
+
+    def prepare(self, shape):
+        """
+        Pixel polygons, crop rectangles and the union mask for a frame of the
+        given (height, width) shape, cached per shape.
+        """
+        shape = tuple(shape[:2])
+        if shape not in self._cache:
+            h, w = shape
+            polygons = [np.round(points * [w, h]).astype(np.int32) for _, points in self.zones]
+            mask = np.zeros(shape, dtype=np.uint8)
+            rects = []
+            for polygon in polygons:
+                cv2.fillPoly(mask, [polygon], 1)
+                x, y, bw, bh = cv2.boundingRect(polygon)
+                rects.append((max(x, 0), max(y, 0), min(x + bw, w), min(y + bh, h)))
+            self._cache[shape] = (polygons, rects, mask)
+        return self._cache[shape]
+
+    def inside(self, detections, shape):
+        """
+        Keep detections whose box centre lies inside a zone.
+        """
+        _, _, mask = self.prepare(shape)
+        if len(detections) == 0:
+            return detections
+        cx = ((detections.xyxy[:, 0] + detections.xyxy[:, 2]) / 2).astype(np.int64).clip(0, shape[1] - 1)
+        cy = ((detections.xyxy[:, 1] + detections.xyxy[:, 3]) / 2).astype(np.int64).clip(0, shape[0] - 1)
+        return detections[mask[cy, cx] > 0]
+
+    def input_shapes(self, shape, imgsz=640, rect=True, stride=32):
+        """
+        Model input (height, width) per zone crop of a frame of the given
+        shape: each crop keeps the scale the whole frame would get at imgsz,
+        rounded up to the stride, so the zones together never cost more
+        pixels than their own area at that scale. Without rect each crop gets
+        a square of its longest side.
+        """
+        _, rects, _ = self.prepare(shape)
+        scale = imgsz / max(shape[:2])
+        shapes = []
+        for x1, y1, x2, y2 in rects:
+            h, w = (max(32, math.ceil(side * scale / stride) * stride) for side in (y2 - y1, x2 - x1))
+            shapes.append((h, w) if rect else (max(h, w),) * 2)
+        return shapes
+
+    def detect(self, model, img, imgsz=640, rect=True):
+        """
+        Run the model on the zone crops of img and return Detections in frame
+        coordinates, limited to the zones. Crops with the same input shape
+        share a batch.
+        """
+        shape = img.shape[:2]
+        _, rects, _ = self.prepare(shape)
+        groups = {}
+        for r, input_shape in zip(rects, self.input_shapes(shape, imgsz, rect)):
+            if r[2] > r[0] and r[3] > r[1]:
+                groups.setdefault(input_shape, []).append(r)
+        if not groups:
+            return Detections.empty()
+
+        parts = []
+        for input_shape, group in groups.items():
+            crops = [np.ascontiguousarray(img[y1:y2, x1:x2]) for x1, y1, x2, y2 in group]
+            results = predict_batch(model, crops, batch_size=len(crops), imgsz=input_shape, draw=False, path='zones')
+            parts += [result.detections.scaled(1.0, (-x1, -y1), shape)
+                      for (x1, y1, _, _), result in zip(group, results)]
+        return self.inside(merge_detections(Detections.concat(parts)), shape)
+
+    def draw(self, img, color=(255, 200, 0)):
+        """
+        Outline the zones on img in place.
+        """
+        polygons, _, _ = self.prepare(img.shape)
+        cv2.polylines(img, polygons, True, color, 2)
+        return img